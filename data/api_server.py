@@ -1,13 +1,46 @@
 import http.server
-import socketserver
 import json
-import csv
-import math
-from collections import defaultdict
+import gzip
+import hashlib
+import itertools
+import contextlib
+import os
+import signal
+import threading
+import time
+import urllib.parse
+import logging
+import numpy as np
+from card_jobs import JobQueue, parse_card, scores_from_columns
+from features import to_float
+from fighter_index import ensure_index, read_fighter_index
+from fighter_search import FighterSearchIndex
+from matchups import compute_table, data_version, fighters_by_weight_class, load_table as load_matchup_table
+from metrics import METRICS
+from model_artifact import load_model
+from prediction_cache import PredictionCache
+from scoring import compile_model
 
-MODEL = None
-FIGHTER_STATS = {}
-WEIGHT_CLASS_DATA = {}
+# Everything a request reads lives in one ServingState; reloads build a new one and swap this reference.
+STATE = None
+RELOAD_LOCK = threading.Lock()
+WATCHED_FILES = ['model.json', 'model.bin', 'ufc-master.csv']
+MAX_BATCH_PAIRS = 100000
+PREDICTION_CACHE = PredictionCache(maxsize=10000)
+# Uploaded event cards are scored here, off the HTTP worker pool.
+CARD_JOBS = JobQueue(workers=2)
+# Request bodies (uploaded cards are the largest) are capped at this.
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# Known paths get their own request metrics; anything else is counted as 'other' to keep the label set bounded.
+ENDPOINTS = {'/weightclasses', '/model_weights', '/cache_stats', '/metrics', '/search', '/rankings', '/who_beats', '/predict', '/predict_batch', '/admin/reload', '/jobs', '/jobs/:id', '/jobs/:id/stream'}
+MAX_SEARCH_LIMIT = 100
+# Responses are machine-read, so they skip json.dumps' default ', ' and ': ' padding.
+COMPACT_JSON = json.JSONEncoder(separators=(',', ':'), check_circular=False)
+# Smaller bodies fit in a packet either way; compressing them only costs CPU.
+MIN_GZIP_BYTES = 512
+
+log = logging.getLogger('api_server')
+access_log = logging.getLogger('api_server.access')
 
 FEATURE_DESCRIPTIONS = {
     'HeightDif': 'height', 'ReachDif': 'reach', 'AgeDif': 'age', 'WinStreakDif': 'win streak',
@@ -16,141 +49,430 @@ FEATURE_DESCRIPTIONS = {
     'WeightDif': 'weight', 'RankDif': 'fighter rank'
 }
 
-def to_float(value, default=0.0):
-    try: return float(value)
-    except (ValueError, TypeError): return default
+class StaticPayload:
+    """A response that only changes on reload, serialized (and gzipped) once with an ETag tied to the model version."""
+    def __init__(self, payload, version):
+        self.body = COMPACT_JSON.encode(payload).encode()
+        self.gzipped = gzip.compress(self.body, mtime=0) if len(self.body) >= MIN_GZIP_BYTES else None
+        self.etag = f'"{version}-{hashlib.sha1(self.body).hexdigest()[:12]}"'
+        # A strong ETag names exact bytes, so the gzip body needs a tag of its own.
+        self.gzip_etag = f'{self.etag[:-1]}-gzip"' if self.gzipped else None
+
+    def representation(self, accept_encoding):
+        """(body, ETag, extra headers) for the coding the client accepts."""
+        if self.gzipped and accepts_gzip(accept_encoding): return self.gzipped, self.gzip_etag, [('Content-Encoding', 'gzip')]
+        return self.body, self.etag, []
+
+    @staticmethod
+    def matches(if_none_match, etag):
+        # If-None-Match may list several tags, weak or strong, or be '*'.
+        if not if_none_match: return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+def accepts_gzip(accept_encoding):
+    # An explicit gzip entry decides on its own (`*;q=1, gzip;q=0` refuses gzip); '*' only stands in without one.
+    qualities = {}
+    for coding in (accept_encoding or '').split(','):
+        name, *params = coding.split(';')
+        name = name.strip().lower()
+        if name not in ('gzip', '*'): continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q': quality = to_float(value.strip())
+        qualities[name] = max(quality, qualities.get(name, 0.0))
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
 
-def get_rank(rank_str, unranked_value=20):
-    if rank_str == 'C': return 0
-    try: return float(rank_str)
-    except (ValueError, TypeError): return unranked_value
+class ServingState:
+    """An immutable snapshot of the model and fighter data. Handlers read STATE once and use only that snapshot."""
+    def __init__(self, model, fighter_stats, weight_class_data, search_index, compiled, version, file_stamps, matchups=None):
+        self.model = model
+        self.fighter_stats = fighter_stats
+        self.weight_class_data = weight_class_data
+        self.search_index = search_index
+        self.compiled = compiled
+        self.version = version
+        self.file_stamps = file_stamps
+        self.matchups = matchups
+        self.static_payloads = {'/weightclasses': StaticPayload(weight_class_data, version), '/model_weights': StaticPayload(model.weight_map(), version)}
+
+def file_stamps(paths=WATCHED_FILES):
+    return {path: (os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None for path in paths}
+
+def build_state():
+    stamps = file_stamps()
+    model = load_model()
+    index_meta = ensure_index('ufc-master.csv')
+    fighter_stats = read_fighter_index()
+    weight_class_data = {wc: names for wc, names in fighters_by_weight_class(fighter_stats).items() if 'Women' not in wc}
+    # Cache keys carry this version, so entries from an older model or dataset can never be served.
+    version = data_version(model, index_meta)
+    compiled = compile_model(model, fighter_stats)
+    # `python matchups.py` prebuilds the table for the current version; otherwise it is computed here.
+    matchups = load_matchup_table(version)
+    if matchups is None: log.info("No prebuilt matchup table for model version %s, computing it in memory.", version); matchups = compute_table(compiled, fighter_stats, version)
+    return ServingState(model, fighter_stats, weight_class_data, FighterSearchIndex(fighter_stats), compiled, version, stamps, matchups)
 
 def load_data():
-    global MODEL, FIGHTER_STATS, WEIGHT_CLASS_DATA
-    print("Loading model and performing advanced data pre-processing...")
-    try:
-        with open('model.json', 'r') as f: MODEL = json.load(f)
-        all_fights = list(csv.DictReader(open('ufc-master.csv', 'r')))
-        temp_fighter_stats = {}
-        for row in all_fights:
-            for corner in ['Red', 'Blue']:
-                fighter_name = row[f'{corner}Fighter'].strip()
-                if fighter_name and fighter_name not in temp_fighter_stats:
-                    rank_key = 'RMatchWCRank' if corner == 'Red' else 'BMatchWCRank'
-                    temp_fighter_stats[fighter_name] = {
-                        'Name': fighter_name, 'WeightClass': row['WeightClass'], 'MatchWCRank': row[rank_key],
-                        'HeightCms': row[f'{corner}HeightCms'], 'ReachCms': row[f'{corner}ReachCms'], 'Age': row[f'{corner}Age'], 'Stance': row[f'{corner}Stance'],
-                        'CurrentWinStreak': row[f'{corner}CurrentWinStreak'], 'Losses': row[f'{corner}Losses'], 'AvgSigStrLanded': row[f'{corner}AvgSigStrLanded'],
-                        'AvgTDLanded': row[f'{corner}AvgTDLanded'], 'TotalRoundsFought': row[f'{corner}TotalRoundsFought'], 'TotalTitleBouts': row[f'{corner}TotalTitleBouts'],
-                        'AvgSigStrPct': row[f'{corner}AvgSigStrPct'], 'AvgTDPct': row[f'{corner}AvgTDPct'], 'AvgSubAtt': row[f'{corner}AvgSubAtt'],
-                        'Wins': row[f'{corner}Wins'], 'Odds': row[f'{corner}Odds'], 'WeightLbs': row[f'{corner}WeightLbs']
-                    }
-        for fighter_name in temp_fighter_stats:
-            ranked_wins = 0
-            for fight in all_fights:
-                if (fight['RedFighter'] == fighter_name and fight['Winner'] == 'Red' and get_rank(fight['BMatchWCRank']) <= 15) or \
-                   (fight['BlueFighter'] == fighter_name and fight['Winner'] == 'Blue' and get_rank(fight['RMatchWCRank']) <= 15):
-                    ranked_wins += 1
-            temp_fighter_stats[fighter_name]['RankedWins'] = ranked_wins
-        FIGHTER_STATS = temp_fighter_stats
-        for name, stats in FIGHTER_STATS.items():
-            wc = stats.get('WeightClass')
-            if wc and 'Women' not in wc:
-                if wc not in WEIGHT_CLASS_DATA: WEIGHT_CLASS_DATA[wc] = []
-                WEIGHT_CLASS_DATA[wc].append(name)
-        print("Data loaded successfully.")
-    except FileNotFoundError as e: print(f"Error loading data: {e}"); MODEL = None
-
-def predict_winner(red_fighter_name, blue_fighter_name):
-    print(f"\n--- PREDICTION REQUEST: {red_fighter_name} vs {blue_fighter_name} ---")
-    if not MODEL or not FIGHTER_STATS: print("DEBUG: Model or stats not loaded."); return {"error": "Model or fighter data not loaded."}
-    
-    print("DEBUG: Getting fighter stats...")
-    red_stats = FIGHTER_STATS.get(red_fighter_name)
-    blue_stats = FIGHTER_STATS.get(blue_fighter_name)
-    if not red_stats or not blue_stats: print("DEBUG: Fighter stats not found."); return {"error": "One or both fighters not found."}
-
-    weights = MODEL['weights']; scaling_params = MODEL['scaling_params']; z = MODEL['bias']
-    feature_vector = {}; feature_contributions = {}
-    
-    print("DEBUG: Starting feature engineering...")
-    try:
-        diff_attrs = {
-            'WeightDif': 'WeightLbs', 'HeightDif': 'HeightCms', 'ReachDif': 'ReachCms', 'AgeDif': 'Age',
-            'LossDif': 'Losses', 'SigStrDif': 'AvgSigStrLanded',
-            'AvgTDDif': 'AvgTDLanded', 'TotalRoundDif': 'TotalRoundsFought', 'TotalTitleBoutDif': 'TotalTitleBouts'
-        }
-        for key, attr in diff_attrs.items(): feature_vector[key] = to_float(red_stats.get(attr)) - to_float(blue_stats.get(attr))
-        feature_vector['RankDif'] = get_rank(red_stats.get('MatchWCRank')) - get_rank(blue_stats.get('MatchWCRank'))
-        raw_features = ['AvgSigStrLanded', 'AvgSigStrPct', 'AvgTDLanded', 'AvgTDPct', 'AvgSubAtt', 'Wins', 'Losses', 'Odds']
-        for feat in raw_features: feature_vector[f'Red{feat}'] = to_float(red_stats.get(feat)); feature_vector[f'Blue{feat}'] = to_float(blue_stats.get(feat))
-        for f_name in weights.keys():
-            if f_name.startswith('RedStance_'): feature_vector[f_name] = 1 if red_stats.get('Stance') == f_name.replace('RedStance_', '') else 0
-            elif f_name.startswith('BlueStance_'): feature_vector[f_name] = 1 if blue_stats.get('Stance') == f_name.replace('BlueStance_', '') else 0
-        print("DEBUG: Feature engineering successful.")
-    except Exception as e: print(f"DEBUG: CRASH during feature engineering: {e}"); return {"error": f"Could not create feature for prediction. Error: {e}"}
-
-    print("DEBUG: Starting prediction calculation...")
-    for feature, value in feature_vector.items():
-        if feature in weights and feature in scaling_params:
-            scaled_value = (value - to_float(scaling_params[feature].get('mean'))) / to_float(scaling_params[feature].get('std_dev'), default=1)
-            contribution = weights[feature] * scaled_value
-            z += contribution
-            feature_contributions[feature] = contribution
-
-    prob_red_wins = 1 / (1 + math.exp(-z))
+    """Builds a new ServingState off to the side and publishes it with a single reference swap."""
+    global STATE
+    log.info("Loading model and performing advanced data pre-processing...")
+    with RELOAD_LOCK:
+        try: state = build_state()
+        except FileNotFoundError as e: log.error("Error loading data: %s", e); return False
+        except (ValueError, KeyError) as e: log.error("Error loading data, keeping the current model: %s", e); return False
+        # Anything else (a model.json of the wrong shape, a failed index rebuild) must not kill the watcher either.
+        except Exception: log.exception("Unexpected error loading data, keeping the current model."); return False
+        STATE = state
+        PREDICTION_CACHE.clear()
+    log.info("Data loaded successfully (model version %s).", STATE.version)
+    return True
+
+class FileWatcher(threading.Thread):
+    """Polls the watched files and reloads once a change has held still for one interval (e.g. a finished write)."""
+    def __init__(self, interval=2.0):
+        super().__init__(name='model-watcher', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+    def run(self):
+        pending = failed = None
+        while not self.stopped.wait(self.interval):
+            state = STATE
+            stamps = file_stamps()
+            if state is None or stamps == state.file_stamps or stamps == failed: pending = None; continue
+            if stamps != pending: pending = stamps; continue
+            log.info("Detected changes in %s, reloading...", ', '.join(p for p in stamps if stamps[p] != state.file_stamps.get(p)))
+            # A failed reload keeps the old state; don't retry until the files change again.
+            failed = None if load_data() else stamps
+            pending = None
+    def stop(self):
+        self.stopped.set()
+
+def explain_prediction(red_fighter_name, blue_fighter_name, red_stats, blue_stats, feature_contributions):
+    diff_features = {k: v for k, v in feature_contributions.items() if 'Dif' in k}
+    sorted_diffs = sorted(diff_features.items(), key=lambda item: abs(item[1]), reverse=True)
+    top_features = sorted_diffs[:3]
+    if not top_features:
+        main_point = "The model could not identify a single dominant factor for this prediction."
+        details = []
+    else:
+        main_factor = top_features[0]
+        main_point = f"The model's prediction hinges on a significant {FEATURE_DESCRIPTIONS.get(main_factor[0], main_factor[0])} advantage for {red_fighter_name if main_factor[1] > 0 else blue_fighter_name}."
+        details = [f"A secondary factor was a {FEATURE_DESCRIPTIONS.get(f, f)} advantage for {red_fighter_name if c > 0 else blue_fighter_name}." for f, c in top_features[1:]]
+
+    red_wins = to_float(red_stats.get('Wins')); red_losses = to_float(red_stats.get('Losses'))
+    blue_wins = to_float(blue_stats.get('Wins')); blue_losses = to_float(blue_stats.get('Losses'))
+    details.insert(0, f"{red_fighter_name} holds a record of {int(red_wins)}-{int(red_losses)}, while {blue_fighter_name} is {int(blue_wins)}-{int(blue_losses)}.")
+    red_ranked_wins = red_stats.get('RankedWins', 0)
+    blue_ranked_wins = blue_stats.get('RankedWins', 0)
+    if red_ranked_wins != blue_ranked_wins:
+        details.append(f"In terms of schedule strength, {red_fighter_name} has {red_ranked_wins} wins against ranked opponents compared to {blue_ranked_wins} for {blue_fighter_name}.")
+    return {"main_point": main_point, "details": details}
+
+def encode_json(payload):
+    with METRICS.timer('stage:serialization'): return COMPACT_JSON.encode(payload).encode()
+
+def predict_winner(red_fighter_name, blue_fighter_name, encoded=False):
+    """The prediction dict, or with encoded=True its JSON bytes; cache hits then skip serialization entirely."""
+    log.debug("Prediction request: %s vs %s", red_fighter_name, blue_fighter_name)
+    state = STATE
+    if not state or not state.fighter_stats:
+        log.warning("Prediction requested before the model was loaded."); error = {"error": "Model or fighter data not loaded."}
+        return encode_json(error) if encoded else error
+
+    with METRICS.timer('stage:lookup'):
+        red_stats = state.fighter_stats.get(red_fighter_name)
+        blue_stats = state.fighter_stats.get(blue_fighter_name)
+        cache_key = (red_fighter_name, blue_fighter_name, state.version)
+        cached = PREDICTION_CACHE.get(cache_key) if red_stats and blue_stats else None
+    if not red_stats or not blue_stats:
+        log.debug("Fighter stats not found."); error = {"error": "One or both fighters not found."}
+        return encode_json(error) if encoded else error
+    if cached: log.debug("Cache hit."); return cached[1] if encoded else cached[0]
+
+    compiled = state.compiled
+    red_row = compiled.rows[red_fighter_name]; blue_row = compiled.rows[blue_fighter_name]
+
+    with METRICS.timer('stage:scoring'):
+        # Same-division pairs are a single read from the matchup table.
+        prob_red_wins = state.matchups.probability(red_fighter_name, blue_fighter_name) if state.matchups else None
+        if prob_red_wins is None: prob_red_wins = compiled.probability(red_row, blue_row)
     winner = red_fighter_name if prob_red_wins > 0.5 else blue_fighter_name
     confidence = prob_red_wins if winner == red_fighter_name else 1 - prob_red_wins
-    print("DEBUG: Prediction calculation successful.")
 
-    print("DEBUG: Starting explanation generation...")
     try:
-        diff_features = {k: v for k, v in feature_contributions.items() if 'Dif' in k}
-        sorted_diffs = sorted(diff_features.items(), key=lambda item: abs(item[1]), reverse=True)
-        top_features = sorted_diffs[:3]
-        if not top_features:
-            main_point = "The model could not identify a single dominant factor for this prediction."
-            details = []
-        else:
-            main_factor = top_features[0]
-            main_point = f"The model's prediction hinges on a significant {FEATURE_DESCRIPTIONS.get(main_factor[0], main_factor[0])} advantage for {red_fighter_name if main_factor[1] > 0 else blue_fighter_name}."
-            details = [f"A secondary factor was a {FEATURE_DESCRIPTIONS.get(f, f)} advantage for {red_fighter_name if c > 0 else blue_fighter_name}." for f, c in top_features[1:]]
-
-        red_wins = to_float(red_stats.get('Wins')); red_losses = to_float(red_stats.get('Losses'))
-        blue_wins = to_float(blue_stats.get('Wins')); blue_losses = to_float(blue_stats.get('Losses'))
-        details.insert(0, f"{red_fighter_name} holds a record of {int(red_wins)}-{int(red_losses)}, while {blue_fighter_name} is {int(blue_wins)}-{int(blue_losses)}.")
-        red_ranked_wins = red_stats.get('RankedWins', 0)
-        blue_ranked_wins = blue_stats.get('RankedWins', 0)
-        if red_ranked_wins != blue_ranked_wins:
-            details.append(f"In terms of schedule strength, {red_fighter_name} has {red_ranked_wins} wins against ranked opponents compared to {blue_ranked_wins} for {blue_fighter_name}.")
-        print("DEBUG: Explanation generation successful.")
-    except Exception as e: print(f"DEBUG: CRASH during explanation generation: {e}"); return {"error": f"Explanation generation failed. Error: {e}"}
-
-    result = {"PredictedWinner": winner, "Confidence": f"{confidence * 100:.2f}%", "explanation": {"main_point": main_point, "details": details}}
-    print(f"DEBUG: Successfully built final result object. Returning...\n{result}")
-    return result
+        with METRICS.timer('stage:contributions'):
+            feature_contributions = dict(zip(compiled.features, compiled.contributions(red_row, blue_row).tolist()))
+        with METRICS.timer('stage:explanation'):
+            explanation = explain_prediction(red_fighter_name, blue_fighter_name, red_stats, blue_stats, feature_contributions)
+    except Exception as e:
+        log.exception("Explanation generation failed."); error = {"error": f"Explanation generation failed. Error: {e}"}
+        return encode_json(error) if encoded else error
+
+    result = {"PredictedWinner": winner, "Confidence": f"{confidence * 100:.2f}%", "explanation": explanation}
+    # The encoded body is cached alongside the dict, so repeat /predict calls write stored bytes.
+    body = encode_json(result)
+    PREDICTION_CACHE.put(cache_key, (result, body))
+    log.debug("Prediction result: %s", result)
+    return body if encoded else result
+
+def round_robin_pairs(weight_class, state=None):
+    state = state or STATE
+    names = [name for name, stats in state.fighter_stats.items() if stats.get('WeightClass') == weight_class] if state else []
+    return list(itertools.combinations(names, 2))
+
+def predict_batch(pairs, explain=True, state=None):
+    """Scores every (red, blue) pair in one vectorized pass; results come back in request order."""
+    state = state or STATE
+    if not state or not state.fighter_stats: return {"error": "Model or fighter data not loaded."}
+    if len(pairs) > MAX_BATCH_PAIRS: return {"error": f"Batch of {len(pairs)} pairs exceeds the limit of {MAX_BATCH_PAIRS}."}
+
+    compiled = state.compiled
+    results = [None] * len(pairs); found = []
+    for i, (red_name, blue_name) in enumerate(pairs):
+        if red_name not in compiled.rows or blue_name not in compiled.rows: results[i] = {"RedFighter": red_name, "BlueFighter": blue_name, "error": "One or both fighters not found."}; continue
+        found.append(i)
+    if not found: return {"results": results}
+
+    red_rows = np.array([compiled.rows[pairs[i][0]] for i in found]); blue_rows = np.array([compiled.rows[pairs[i][1]] for i in found])
+    with METRICS.timer('stage:batch_scoring'):
+        prob_red_wins = compiled.probabilities(red_rows, blue_rows).tolist()
+    with METRICS.timer('stage:batch_contributions'):
+        contributions = compiled.contributions(red_rows, blue_rows).tolist() if explain else None
+
+    for row, i in enumerate(found):
+        red_name, blue_name = pairs[i]; p = prob_red_wins[row]
+        winner = red_name if p > 0.5 else blue_name
+        confidence = p if winner == red_name else 1 - p
+        result = {"RedFighter": red_name, "BlueFighter": blue_name, "PredictedWinner": winner, "Confidence": f"{confidence * 100:.2f}%"}
+        if explain: result["explanation"] = explain_prediction(red_name, blue_name, state.fighter_stats[red_name], state.fighter_stats[blue_name], dict(zip(compiled.features, contributions[row])))
+        results[i] = result
+    return {"results": results}
 
 class PredictionServer(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True # Keep-alive responses would otherwise stall on delayed ACKs.
+    timeout = 30
+    # A buffered wfile lets the status line, headers and body of a response leave in one send; handle_one_request
+    # flushes it after every request, and the job stream flushes after each line.
+    wbufsize = 1 << 16
+    def send_json(self, payload, status=200):
+        self.send_body(encode_json(payload), status)
+    def send_body(self, body, status=200, headers=()):
+        self.send_response(status); self.send_header('Content-type', 'application/json'); self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in headers: self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers(); self.wfile.write(body)
+    def send_static(self, payload):
+        # Clients revalidate with If-None-Match and get a bodiless 304 while the model version is unchanged.
+        body, etag, encoding = payload.representation(self.headers.get('Accept-Encoding'))
+        headers = [('ETag', etag), ('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding')]
+        if payload.matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            for name, value in headers: self.send_header(name, value)
+            self.end_headers(); return
+        self.send_body(body, headers=headers + encoding)
+    def send_response(self, code, message=None):
+        METRICS.increment(f'responses:{code}')
+        self.responded = True
+        super().send_response(code, message)
+    def log_message(self, format, *args):
+        # Per-request access logging is debug-only; BaseHTTPRequestHandler would write every request to stderr.
+        access_log.debug("%s - %s", self.address_string(), format % args)
+    def handle_one_request(self):
+        self.raw_requestline = b''; self.command = None; self.responded = False
+        start = time.perf_counter()
+        try: super().handle_one_request()
+        except (BrokenPipeError, ConnectionResetError): self.close_connection = True
+        except Exception:
+            # A handler that raised (e.g. a malformed /predict body) still gets a 500 and shows up in the metrics.
+            log.exception("Unhandled error serving %s %s", self.command, getattr(self, 'path', ''))
+            METRICS.increment('errors:unhandled')
+            self.close_connection = True
+            if not self.responded:
+                try: self.send_json({"error": "Internal server error."}, status=500)
+                except OSError: pass
+        finally:
+            if self.command:
+                path = self.path.split('?', 1)[0]
+                if path.startswith('/jobs/'): path = '/jobs/:id/stream' if path.endswith('/stream') else '/jobs/:id'
+                endpoint = f"{self.command} {path if path in ENDPOINTS else 'other'}"
+                METRICS.increment(f'requests:{endpoint}')
+                METRICS.observe(f'request:{endpoint}', time.perf_counter() - start)
+    def send_empty(self, status):
+        self.send_response(status); self.send_header('Content-Length', '0'); self.end_headers()
+    def send_search(self, state):
+        # /search?q=cov&weight_class=Welterweight&limit=10&offset=0
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        try:
+            limit = min(max(int(params.get('limit', ['10'])[0]), 0), MAX_SEARCH_LIMIT)
+            offset = max(int(params.get('offset', ['0'])[0]), 0)
+        except ValueError: self.send_json({"error": "limit and offset must be integers."}, status=400); return
+        query = params.get('q', [''])[0]
+        with METRICS.timer('stage:search'):
+            result = state.search_index.search(query, params.get('weight_class', [None])[0], limit, offset, fuzzy=params.get('fuzzy', ['1'])[0] != '0')
+        self.send_json(dict(result, query=query, limit=limit, offset=offset))
+    def send_matchups(self, state):
+        # /rankings?weight_class=Lightweight and /who_beats?fighter=Islam%20Makhachev&min_probability=0.5
+        parts = urllib.parse.urlsplit(self.path); params = urllib.parse.parse_qs(parts.query)
+        if parts.path == '/rankings':
+            weight_class = params.get('weight_class', [''])[0]
+            with METRICS.timer('stage:matchups'): ranking = state.matchups.rank(weight_class)
+            if ranking is None: self.send_json({"error": f"Unknown weight class '{weight_class}'."}, status=404); return
+            self.send_json({"weight_class": weight_class, "model_version": state.version, "rankings": ranking})
+            return
+        fighter = params.get('fighter', [''])[0].strip()
+        try: min_probability = float(params.get('min_probability', ['0.5'])[0])
+        except ValueError: self.send_json({"error": "min_probability must be a number."}, status=400); return
+        with METRICS.timer('stage:matchups'): rivals = state.matchups.beats(fighter, min_probability)
+        if rivals is None: self.send_json({"error": "Fighter not found."}, status=404); return
+        self.send_json({"fighter": fighter, "weight_class": state.matchups.positions[fighter][0], "model_version": state.version, "favoured_opponents": rivals})
+    def send_job(self):
+        # /jobs/<id>?offset=n polls for results past n; /jobs/<id>/stream sends each result as a JSON line as it is scored.
+        parts = urllib.parse.urlsplit(self.path); segments = parts.path.strip('/').split('/')
+        job = CARD_JOBS.get(segments[1]) if len(segments) in (2, 3) else None
+        if job is None or (len(segments) == 3 and segments[2] != 'stream'): self.send_json({"error": "Job not found."}, status=404); return
+        if len(segments) == 2:
+            try: offset = max(int(urllib.parse.parse_qs(parts.query).get('offset', ['0'])[0]), 0)
+            except ValueError: self.send_json({"error": "offset must be an integer."}, status=400); return
+            self.send_json(job.summary(offset))
+            return
+        chunked = self.request_version == 'HTTP/1.1' and self.protocol_version == 'HTTP/1.1'
+        self.send_response(200); self.send_header('Content-type', 'application/x-ndjson'); self.send_header('Access-Control-Allow-Origin', '*')
+        if chunked: self.send_header('Transfer-Encoding', 'chunked')
+        else: self.close_connection = True
+        self.end_headers()
+        def write(payload):
+            line = COMPACT_JSON.encode(payload).encode() + b'\n'
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line) if chunked else line); self.wfile.flush()
+        seen = 0
+        try:
+            while True:
+                results, done = job.wait(seen, timeout=self.timeout)
+                for result in results: write(result)
+                seen += len(results)
+                if done: break
+            summary = job.summary(seen); del summary['results']
+            write(summary)
+            if chunked: self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError): self.close_connection = True
+    def work_slot(self):
+        # The single-threaded server has no slots to take.
+        return getattr(self.server, 'work_slots', None) or contextlib.nullcontext()
     def do_GET(self):
-        if self.path == '/weightclasses': self.send_response(200); self.send_header('Content-type', 'application/json'); self.send_header('Access-Control-Allow-Origin', '*'); self.end_headers(); self.wfile.write(json.dumps(WEIGHT_CLASS_DATA).encode())
-        elif self.path == '/model_weights': self.send_response(200); self.send_header('Content-type', 'application/json'); self.send_header('Access-Control-Allow-Origin', '*'); self.end_headers(); self.wfile.write(json.dumps(MODEL.get('weights', {})).encode())
-        else: self.send_response(404); self.end_headers()
+        # A job stream spends its life waiting on the card worker, so it runs on its connection's thread
+        # without a work slot; polling /jobs/<id> is a quick read and takes one like any other request.
+        if self.path.startswith('/jobs/') and urllib.parse.urlsplit(self.path).path.endswith('/stream'): self.send_job(); return
+        with self.work_slot(): self.route_get()
     def do_POST(self):
+        # The body is read before taking a work slot, so a slow upload never holds one.
+        try: length = int(self.headers.get('Content-Length', 0))
+        except ValueError: length = -1
+        if length < 0: self.send_json({"error": "Content-Length must be a non-negative integer."}, status=400); self.close_connection = True; return
+        if length > MAX_BODY_BYTES: self.send_json({"error": f"Request body exceeds {MAX_BODY_BYTES} bytes."}, status=413); self.close_connection = True; return
+        body = self.rfile.read(length)
+        with self.work_slot(): self.route_post(body)
+    def route_get(self):
+        state = STATE
+        if self.path in state.static_payloads: self.send_static(state.static_payloads[self.path])
+        elif self.path == '/cache_stats': self.send_json(dict(PREDICTION_CACHE.stats(), model_version=state.version))
+        elif self.path == '/metrics': self.send_json(dict(METRICS.snapshot(), cache=PREDICTION_CACHE.stats(), model_version=state.version))
+        elif self.path.startswith('/search?') or self.path == '/search': self.send_search(state)
+        elif self.path.split('?', 1)[0] in ('/rankings', '/who_beats'): self.send_matchups(state)
+        elif self.path.startswith('/jobs/'): self.send_job()
+        else: self.send_empty(404)
+    def route_post(self, raw_body):
         if self.path == '/predict':
-            print(f"\n--- RECEIVED POST REQUEST ---")
-            content_length = int(self.headers['Content-Length'])
-            body = json.loads(self.rfile.read(content_length))
-            print(f"DEBUG: Request body: {body}")
-            prediction = predict_winner(body.get('red_fighter', '').strip(), body.get('blue_fighter', '').strip())
-            self.send_response(200); self.send_header('Content-type', 'application/json'); self.send_header('Access-Control-Allow-Origin', '*'); self.end_headers(); self.wfile.write(json.dumps(prediction).encode())
-        else: self.send_response(404); self.end_headers()
+            try:
+                body = json.loads(raw_body)
+                log.debug("Request body: %s", body)
+                red, blue = str(body.get('red_fighter', '')).strip(), str(body.get('blue_fighter', '')).strip()
+            except (ValueError, TypeError, AttributeError) as e: self.send_json({"error": f"Malformed prediction request: {e}"}, status=400); return
+            self.send_body(predict_winner(red, blue, encoded=True))
+        elif self.path == '/predict_batch':
+            try:
+                body = json.loads(raw_body)
+                state = STATE
+                if body.get('weight_class'): pairs = round_robin_pairs(body['weight_class'], state)
+                else:
+                    # Pairs may be {"red_fighter": ..., "blue_fighter": ...} objects or [red, blue] lists.
+                    pairs = [(p.get('red_fighter', ''), p.get('blue_fighter', '')) if isinstance(p, dict) else tuple(p) for p in body.get('pairs', [])]
+                    pairs = [(str(red).strip(), str(blue).strip()) for red, blue in pairs]
+            except (ValueError, TypeError, AttributeError) as e: self.send_json({"error": f"Malformed batch request: {e}"}, status=400); return
+            result = predict_batch(pairs, explain=body.get('explain', True) is not False, state=state)
+            self.send_json(result, status=400 if 'error' in result else 200)
+        elif self.path == '/jobs':
+            state = STATE
+            if not state: self.send_json({"error": "Model or fighter data not loaded."}, status=503); return
+            try:
+                header, rows = parse_card(raw_body, self.headers.get('Content-Type', ''))
+                scores_from_columns(header, state.model)
+            except (ValueError, UnicodeDecodeError) as e: self.send_json({"error": f"Malformed card: {e}"}, status=400); return
+            job = CARD_JOBS.submit(header, rows, state)
+            self.send_json({"job_id": job.id, "status": job.status, "total": len(rows), "model_version": state.version,
+                            "status_url": f"/jobs/{job.id}", "stream_url": f"/jobs/{job.id}/stream"}, status=202)
+        elif self.path == '/admin/reload':
+            # In-flight requests keep the snapshot they started with while the new state is built.
+            if self.client_address[0] not in ('127.0.0.1', '::1'): self.send_json({"error": "Reload is only allowed from localhost."}, status=403); return
+            reloaded = load_data()
+            self.send_json({"reloaded": reloaded, "model_version": STATE.version if STATE else None}, status=200 if reloaded else 500)
+        else: self.send_empty(404)
     def do_OPTIONS(self):
-        self.send_response(200); self.send_header('Access-control-allow-origin', '*'); self.send_header('Access-control-allow-methods', 'GET, POST, OPTIONS'); self.send_header("Access-Control-Allow-Headers", "X-Requested-With, Content-Type"); self.end_headers()
+        self.send_response(200); self.send_header('Access-control-allow-origin', '*'); self.send_header('Access-control-allow-methods', 'GET, POST, OPTIONS'); self.send_header("Access-Control-Allow-Headers", "X-Requested-With, Content-Type"); self.send_header('Content-Length', '0'); self.end_headers()
+
+class PredictionHTTPServer(http.server.ThreadingHTTPServer):
+    """One thread per connection, so an idle keep-alive client only ever costs a blocked thread.
+
+    The work itself is bounded: a request takes one of `workers` slots while it is handled, and
+    requests beyond that wait for a slot rather than oversubscribing the CPU.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    def __init__(self, server_address, handler_class, workers=8, drain_timeout=30):
+        self.workers = workers
+        self.work_slots = threading.BoundedSemaphore(workers)
+        self.drain_timeout = drain_timeout
+        super().__init__(server_address, handler_class)
+    def server_close(self):
+        super().server_close()
+        # Idle keep-alive threads are daemons and die with the process; only requests holding a slot are waited for.
+        deadline = time.monotonic() + self.drain_timeout
+        drained = 0
+        while drained < self.workers and self.work_slots.acquire(timeout=max(deadline - time.monotonic(), 0)): drained += 1
+        for _ in range(drained): self.work_slots.release()
+
+class LegacyPredictionServer(PredictionServer):
+    protocol_version = 'HTTP/1.0'
+
+def make_server(port=8000, workers=8, timeout=30):
+    # workers=0 keeps the original single-threaded, one-connection-at-a-time server.
+    if workers <= 0:
+        return http.server.HTTPServer(('', port), type('Handler', (LegacyPredictionServer,), {'timeout': timeout}))
+    return PredictionHTTPServer(('', port), type('Handler', (PredictionServer,), {'timeout': timeout}), workers=workers, drain_timeout=timeout)
 
-def run_server(port=8000):
+def run_server(port=8000, workers=8, timeout=30, watch_interval=2.0, log_level=None):
+    # Debug logging (per-request traces and the access log) stays off unless LOG_LEVEL=DEBUG or log_level='DEBUG'.
+    logging.basicConfig(level=log_level or os.environ.get('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
     load_data()
-    if not MODEL: print("Could not load model. Aborting server start."); return
-    with socketserver.TCPServer(('', port), PredictionServer) as httpd: print(f"Serving at port {port}"); httpd.serve_forever()
+    if not STATE: log.error("Could not load model. Aborting server start."); return
+    httpd = make_server(port, workers, timeout)
+    # watch_interval=None disables file watching; POST /admin/reload still works.
+    watcher = FileWatcher(watch_interval) if watch_interval else None
+    if watcher: watcher.start()
+    # serve_forever() runs on this thread, so shutdown() must be requested from another one.
+    stop = lambda signum, frame: threading.Thread(target=httpd.shutdown, daemon=True).start()
+    # Signal handlers can only be installed from the main thread; an app that runs the server on
+    # another thread handles SIGTERM itself and calls httpd.shutdown().
+    if threading.current_thread() is threading.main_thread(): signal.signal(signal.SIGTERM, stop)
+    log.info("Serving at port %d with %d worker(s)", port, max(workers, 1))
+    try: httpd.serve_forever()
+    except KeyboardInterrupt: pass
+    finally:
+        log.info("Shutting down, finishing in-flight requests...")
+        if watcher: watcher.stop()
+        httpd.server_close()
+        CARD_JOBS.shutdown()
 
 if __name__ == "__main__":
     run_server()
@@ -0,0 +1,219 @@
+import csv
+import os
+import numpy as np
+from dataset import load_npy_table
+from model_artifact import stance_feature
+from features import diff_map
+
+# Upper edges of the calibration buckets over the predicted probability of a Red win.
+CALIBRATION_EDGES = np.linspace(0.1, 1.0, 10)
+
+def parse_floats(values):
+    """Column of CSV strings -> float64 array with NaN for empty or unparseable cells."""
+    try: return np.array([v if v else 'nan' for v in values], dtype=np.float64)
+    except ValueError:
+        out = np.empty(len(values))
+        for i, v in enumerate(values):
+            try: out[i] = float(v)
+            except ValueError: out[i] = np.nan
+        return out
+
+def parse_ranks(values, unranked_value=20.0):
+    # Same mapping as get_rank: 'C' is the champion, anything unparseable is unranked.
+    ranks = parse_floats(['0' if v == 'C' else v for v in values])
+    ranks[np.isnan(ranks)] = unranked_value
+    return ranks
+
+def parse_winner(values):
+    # 1 for a Red win, 0 for Blue; engineered tables already hold 1/0. Draws and unknowns are NaN.
+    labels = {'Red': '1', 'Blue': '0'}
+    return parse_floats([labels.get(v, v) for v in values])
+
+class CsvChunk:
+    def __init__(self, header, rows):
+        self.columns = header
+        self._index = {name: i for i, name in enumerate(header)}
+        self._rows = rows
+
+    def __len__(self): return len(self._rows)
+
+    def strings(self, name):
+        i = self._index.get(name)
+        if i is None: return None
+        return [row[i] if i < len(row) else '' for row in self._rows]
+
+    def floats(self, name):
+        values = self.strings(name)
+        return None if values is None else parse_floats(values)
+
+    def labels(self):
+        values = self.strings('Winner')
+        return np.full(len(self), np.nan) if values is None else parse_winner(values)
+
+class ArrayChunk:
+    """A row slice of a numeric table such as testing.npy; there are no string columns."""
+    def __init__(self, columns, data):
+        self.columns = columns
+        self._index = {name: i for i, name in enumerate(columns)}
+        self._data = data
+
+    def __len__(self): return len(self._data)
+
+    def strings(self, name): return None
+
+    def floats(self, name):
+        i = self._index.get(name)
+        return None if i is None else np.asarray(self._data[:, i], dtype=np.float64)
+
+    def labels(self):
+        values = self.floats('Winner')
+        return np.full(len(self), np.nan) if values is None else values
+
+def iter_chunks(path, chunk_rows=65536):
+    """Yields chunks of a CSV (parsed lazily per column) or a memory-mapped .npy table in bounded memory."""
+    if path.endswith('.npy'):
+        columns, data = load_npy_table(path)
+        for start in range(0, len(data), chunk_rows): yield ArrayChunk(columns, data[start:start + chunk_rows])
+        return
+    with open(path, 'r', newline='') as infile:
+        reader = csv.reader(infile)
+        header = next(reader, None) or []
+        rows = []
+        for row in reader:
+            if not row: continue
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                yield CsvChunk(header, rows)
+                rows = []
+        if rows: yield CsvChunk(header, rows)
+
+def resolve_table(name):
+    # Same preference as dataset.load_table: the .npy when it is at least as new as the CSV.
+    if name.endswith('.csv') or name.endswith('.npy'): return name
+    npy_path, csv_path = f'{name}.npy', f'{name}.csv'
+    if os.path.exists(npy_path) and (not os.path.exists(csv_path) or os.path.getmtime(npy_path) >= os.path.getmtime(csv_path)):
+        return npy_path
+    return csv_path
+
+class BatchScorer:
+    """Scores whole chunks of fights as one matrix product against a ModelArtifact's folded weights.
+
+    A chunk may be an engineered table (testing.csv/.npy) or a raw fight CSV (ufc-master.csv,
+    upcoming.csv); raw fights are engineered the way prepare_training_data does. Missing values
+    contribute nothing.
+    """
+    def __init__(self, model):
+        scaled = [j for j, f in enumerate(model.features) if model.scaling(f)]
+        self.features = [model.features[j] for j in scaled]
+        self.folded = np.asarray(model.folded[scaled], dtype=np.float64)
+        # A missing value stands in as the feature's mean, which is exactly zero after scaling.
+        self.means = np.array([model.scaling(f)[0] for f in self.features], dtype=np.float64)
+        self.bias = model.folded_bias
+
+    def _feature(self, chunk, feature):
+        # Raw fight CSVs also carry Blue-minus-Red columns such as LossDif, so the corner columns
+        # training engineered from take precedence over a same-named column.
+        attr = diff_map.get(feature)
+        if attr is not None and 'Dif' not in attr:
+            red, blue = chunk.floats(f'Red{attr}'), chunk.floats(f'Blue{attr}')
+            if red is not None and blue is not None: return red - blue
+        if feature == 'RankDif':
+            red, blue = chunk.strings('RMatchWCRank'), chunk.strings('BMatchWCRank')
+            if red is not None and blue is not None: return parse_ranks(red) - parse_ranks(blue)
+        values = chunk.floats(feature)
+        if values is not None: return values
+        one_hot = stance_feature(feature)
+        if one_hot:
+            corner, stance = one_hot
+            values = chunk.strings(f'{corner}Stance')
+            if values is not None: return (np.array(values, dtype=object) == stance).astype(np.float64)
+        return np.full(len(chunk), np.nan)
+
+    def feature_matrix(self, chunk):
+        return np.column_stack([self._feature(chunk, f) for f in self.features]) if self.features else np.empty((len(chunk), 0))
+
+    def logits(self, chunk):
+        X = self.feature_matrix(chunk)
+        X = np.where(np.isnan(X), self.means, X)
+        return np.clip(self.bias + X @ self.folded, -100, 100)
+
+    def probabilities(self, chunk):
+        return 1 / (1 + np.exp(-self.logits(chunk)))
+
+def american_payout(odds):
+    # Profit per unit staked at American odds: +150 pays 1.5, -200 pays 0.5.
+    return np.where(odds > 0, odds / 100, 100 / np.abs(odds))
+
+class ScoreSummary:
+    """Streaming accumulator for accuracy, log-loss, Brier score, calibration and betting ROI."""
+    def __init__(self, edges=CALIBRATION_EDGES):
+        self.edges = edges
+        self.rows = self.labeled = self.correct = 0
+        self.log_loss = self.brier = 0.0
+        self.bucket_counts = np.zeros(len(edges), dtype=np.int64)
+        self.bucket_predicted = np.zeros(len(edges))
+        self.bucket_observed = np.zeros(len(edges))
+        self.bets = 0
+        self.profit = 0.0
+
+    def update(self, probability, winner, red_odds=None, blue_odds=None):
+        """probability: P(Red wins) per row; winner: 1/0/NaN; odds: American odds per corner or None."""
+        self.rows += len(probability)
+        labeled = ~np.isnan(winner)
+        p, y = probability[labeled], winner[labeled]
+        self.labeled += len(y)
+        predicted_red = p >= 0.5
+        self.correct += int((predicted_red == (y == 1)).sum())
+        clipped = np.clip(p, 1e-15, 1 - 1e-15)
+        self.log_loss -= float((y * np.log(clipped) + (1 - y) * np.log(1 - clipped)).sum())
+        self.brier += float(((p - y) ** 2).sum())
+        buckets = np.minimum(np.searchsorted(self.edges, p, side='right'), len(self.edges) - 1)
+        self.bucket_counts += np.bincount(buckets, minlength=len(self.edges))
+        self.bucket_predicted += np.bincount(buckets, weights=p, minlength=len(self.edges))
+        self.bucket_observed += np.bincount(buckets, weights=y, minlength=len(self.edges))
+        if red_odds is not None and blue_odds is not None:
+            # One unit on the predicted winner wherever that corner has a price.
+            odds = np.where(predicted_red, red_odds[labeled], blue_odds[labeled])
+            priced = ~np.isnan(odds) & (odds != 0)
+            won = predicted_red[priced] == (y[priced] == 1)
+            self.bets += int(priced.sum())
+            self.profit += float(np.where(won, american_payout(odds[priced]), -1.0).sum())
+
+    def report(self):
+        n = self.labeled
+        calibration = []
+        lower = 0.0
+        for upper, count, predicted, observed in zip(self.edges, self.bucket_counts, self.bucket_predicted, self.bucket_observed):
+            if count: calibration.append({'range': [round(lower, 2), round(float(upper), 2)], 'count': int(count),
+                                          'mean_predicted': predicted / count, 'observed_red_rate': observed / count})
+            lower = float(upper)
+        return {
+            'rows': self.rows, 'labeled': n,
+            'accuracy': self.correct / n if n else None,
+            'log_loss': self.log_loss / n if n else None,
+            'brier': self.brier / n if n else None,
+            'calibration': calibration,
+            'bets': self.bets, 'profit': self.profit,
+            'roi': self.profit / self.bets if self.bets else None,
+        }
+
+def score_file(model, path, chunk_rows=65536, on_chunk=None):
+    """Scores every row of `path` in chunks and returns the ScoreSummary report.
+
+    on_chunk(chunk, probabilities) is called per chunk, e.g. to stream predictions out.
+    """
+    scorer = BatchScorer(model)
+    summary = ScoreSummary()
+    for chunk in iter_chunks(path, chunk_rows):
+        probability = scorer.probabilities(chunk)
+        summary.update(probability, chunk.labels(), chunk.floats('RedOdds'), chunk.floats('BlueOdds'))
+        if on_chunk is not None: on_chunk(chunk, probability)
+    return summary.report()
+
+def format_report(report):
+    lines = [f"Rows scored: {report['rows']} ({report['labeled']} with a result)"]
+    if report['labeled']:
+        lines += [f"Accuracy: {report['accuracy'] * 100:.2f}%", f"Log-loss: {report['log_loss']:.4f}", f"Brier score: {report['brier']:.4f}", "Calibration (P(Red) bucket: fights, predicted, observed):"]
+        lines += [f"  {b['range'][0]:.1f}-{b['range'][1]:.1f}: {b['count']:6d}  {b['mean_predicted']:.3f}  {b['observed_red_rate']:.3f}" for b in report['calibration']]
+    lines.append(f"ROI betting 1 unit on each pick: {report['roi'] * 100:+.2f}% over {report['bets']} bets" if report['bets'] else "ROI: n/a (no RedOdds/BlueOdds prices)")
+    return '\n'.join(lines)
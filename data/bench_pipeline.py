@@ -0,0 +1,185 @@
+import argparse
+import contextlib
+import csv
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# In pipeline order; each stage reads what the previous ones wrote into the work directory.
+STAGES = ['process', 'prepare', 'train', 'evaluate', 'load_data', 'predict_winner']
+# The default scales finish in about half a minute. --large adds 100x (about 3 minutes, 1 GB of disk) and
+# 1000x (about half an hour, 10 GB of disk, and 2.5 GB peak RSS in train, which holds the whole training matrix).
+DEFAULT_SCALES = '1,10'
+LARGE_SCALES = '100,1000'
+
+def synthesize(source, destination, scale):
+    """Writes `scale` copies of every fight in `source`. Copy k is dated k days earlier, so fight keys stay
+    unique while the roster (and so the served fighter set) stays the same and every stage sees scale x rows."""
+    with open(source, 'r', newline='') as infile:
+        reader = csv.DictReader(infile)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    dates = {row['Date']: datetime.date.fromisoformat(row['Date']) for row in rows}
+    written = 0
+    with open(destination, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for k in range(scale):
+            for row in rows:
+                writer.writerow(dict(row, Date=(dates[row['Date']] - datetime.timedelta(days=k)).isoformat()) if k else row)
+                written += 1
+    return written
+
+def peak_rss_mb():
+    # ru_maxrss survives exec on Linux, so a stage would inherit the harness's own peak; VmHWM does not.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'): return int(line.split()[1]) / 1024
+    except OSError: pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def rss_mb():
+    # Resident memory now: what a loaded server keeps, as opposed to its peak while building.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'): return int(line.split()[1]) / 1024
+    except OSError: return None
+
+def run_stage(stage, pairs=2000, train_iterations=1000):
+    """Runs one stage in the current directory and returns its measurements. Called in a fresh process."""
+    sys.path.insert(0, SCRIPTS_DIR)
+    extra = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage == 'process':
+            from process import process
+            start = time.perf_counter(); process()
+        elif stage == 'prepare':
+            from prepare_training_data import prepare_and_engineer_data
+            start = time.perf_counter(); prepare_and_engineer_data()
+        elif stage == 'train':
+            from train_model import train_model
+            start = time.perf_counter(); train_model(iterations=train_iterations)
+        elif stage == 'evaluate':
+            from evaluate_model import evaluate_model
+            start = time.perf_counter(); evaluate_model()
+        elif stage == 'load_data':
+            import api_server
+            # Cold: builds the fighter index from scratch. Warm: a restart that finds it up to date.
+            start = time.perf_counter()
+            if not api_server.load_data(): raise RuntimeError("load_data failed")
+            elapsed = time.perf_counter() - start
+            warm = time.perf_counter(); api_server.load_data()
+            extra = {'warm_seconds': time.perf_counter() - warm, 'rss_mb': rss_mb(), 'fighters': len(api_server.STATE.fighter_stats)}
+            return dict(seconds=elapsed, peak_rss_mb=peak_rss_mb(), **extra)
+        elif stage == 'predict_winner':
+            import api_server
+            api_server.load_data()
+            names = list(api_server.STATE.fighter_stats)
+            rng = random.Random(0)
+            sample = [tuple(rng.sample(names, 2)) for _ in range(pairs)]
+            api_server.PREDICTION_CACHE.clear()
+            latencies = []
+            start = time.perf_counter()
+            for red, blue in sample:
+                call = time.perf_counter(); api_server.predict_winner(red, blue); latencies.append(time.perf_counter() - call)
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            extra = {'calls': pairs, 'mean_us': elapsed / pairs * 1e6, 'p99_us': latencies[int(0.99 * (pairs - 1))] * 1e6}
+            return dict(seconds=elapsed, peak_rss_mb=peak_rss_mb(), **extra)
+        else:
+            raise ValueError(f"Unknown stage '{stage}'.")
+    return {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+
+def bench_scale(scale, workdir, pairs, train_iterations):
+    os.makedirs(workdir, exist_ok=True)
+    start = time.perf_counter()
+    rows = synthesize(os.path.join(SCRIPTS_DIR, 'ufc-master.csv'), os.path.join(workdir, 'ufc-master.csv'), scale)
+    result = {'rows': rows, 'synthesize_seconds': time.perf_counter() - start, 'stages': {}}
+    for stage in STAGES:
+        command = [sys.executable, os.path.abspath(__file__), '--run-stage', stage, '--pairs', str(pairs), '--train-iterations', str(train_iterations)]
+        completed = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+        if completed.returncode != 0:
+            # Later stages depend on this one's output, so stop this scale here.
+            result['stages'][stage] = {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f'exit code {completed.returncode}'}
+            break
+        result['stages'][stage] = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"  {scale}x {stage:<15} {result['stages'][stage]['seconds']:9.3f}s  peak {result['stages'][stage]['peak_rss_mb']:8.1f} MB", file=sys.stderr)
+    return result
+
+# Growth smaller than this never counts, so millisecond stages don't flap on scheduler noise.
+MIN_DELTA = {'seconds': 0.05, 'peak_rss_mb': 5.0}
+
+def compare(results, baseline, threshold):
+    """Lists (scale, stage, metric, baseline, current) for every timing or peak-memory figure that grew by more than `threshold`."""
+    regressions = []
+    for scale, current in results['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if not previous: continue
+        for stage, measured in current['stages'].items():
+            before = previous['stages'].get(stage)
+            if not before or 'error' in before: continue
+            if 'error' in measured: regressions.append((scale, stage, 'error', None, measured['error'])); continue
+            for metric in ('seconds', 'peak_rss_mb'):
+                if measured[metric] > before[metric] * (1 + threshold) and measured[metric] - before[metric] > MIN_DELTA[metric]: regressions.append((scale, stage, metric, before[metric], measured[metric]))
+    return regressions
+
+def parse_scales(scales, large=False):
+    parsed = [int(s) for s in scales.split(',') if s]
+    if large: parsed += [scale for scale in map(int, LARGE_SCALES.split(',')) if scale not in parsed]
+    return parsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and measure peak memory of every pipeline stage on synthetic data scaled up from ufc-master.csv.")
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help=f"Comma-separated row multipliers (default {DEFAULT_SCALES}).")
+    parser.add_argument('--large', action='store_true', help="Also run the 100x and 1000x scales. 1000x needs about 10 GB of disk and 2.5 GB of memory.")
+    parser.add_argument('--workdir', default=None, help="Where to write the synthetic data (default: a temporary directory).")
+    parser.add_argument('--keep', action='store_true', help="Keep the synthetic data and intermediate files.")
+    parser.add_argument('--pairs', type=int, default=2000, help="predict_winner calls to time.")
+    parser.add_argument('--train-iterations', type=int, default=1000)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="A previous --output file to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed relative growth before a figure counts as a regression.")
+    parser.add_argument('--run-stage', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.pairs, args.train_iterations)))
+        return 0
+
+    root = args.workdir or tempfile.mkdtemp(prefix='ufc-bench-')
+    results = {'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                        'cpus': os.cpu_count(), 'train_iterations': args.train_iterations, 'pairs': args.pairs}, 'scales': {}}
+    try:
+        for scale in parse_scales(args.scales, args.large):
+            results['scales'][f'{scale}x'] = bench_scale(scale, os.path.join(root, f'{scale}x'), args.pairs, args.train_iterations)
+    finally:
+        if not args.keep: shutil.rmtree(root, ignore_errors=True)
+
+    with open(args.output, 'w') as outfile: json.dump(results, outfile, indent=4)
+    print(f"Results written to {args.output}")
+    if not args.baseline: return 0
+    with open(args.baseline, 'r') as infile: baseline = json.load(infile)
+    regressions = compare(results, baseline, args.threshold)
+    for scale, stage, metric, before, after in regressions:
+        print(f"REGRESSION {scale} {stage} {metric}: {before} -> {after}" if metric != 'error' else f"REGRESSION {scale} {stage} failed: {after}")
+    if not regressions: print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
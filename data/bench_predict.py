@@ -0,0 +1,55 @@
+import contextlib
+import io
+import json
+import math
+import random
+import timeit
+
+import api_server
+from features import get_rank, to_float
+
+def dict_probability(red_stats, blue_stats, model):
+    # The per-request path predict_winner used before model compilation, kept as the baseline.
+    weights = model['weights']; scaling_params = model['scaling_params']; z = model['bias']
+    diff_attrs = {
+        'WeightDif': 'WeightLbs', 'HeightDif': 'HeightCms', 'ReachDif': 'ReachCms', 'AgeDif': 'Age',
+        'LossDif': 'Losses', 'SigStrDif': 'AvgSigStrLanded',
+        'AvgTDDif': 'AvgTDLanded', 'TotalRoundDif': 'TotalRoundsFought', 'TotalTitleBoutDif': 'TotalTitleBouts'
+    }
+    feature_vector = {}
+    for key, attr in diff_attrs.items(): feature_vector[key] = to_float(red_stats.get(attr)) - to_float(blue_stats.get(attr))
+    feature_vector['RankDif'] = get_rank(red_stats.get('MatchWCRank')) - get_rank(blue_stats.get('MatchWCRank'))
+    raw_features = ['AvgSigStrLanded', 'AvgSigStrPct', 'AvgTDLanded', 'AvgTDPct', 'AvgSubAtt', 'Wins', 'Losses', 'Odds']
+    for feat in raw_features: feature_vector[f'Red{feat}'] = to_float(red_stats.get(feat)); feature_vector[f'Blue{feat}'] = to_float(blue_stats.get(feat))
+    for f_name in weights.keys():
+        if f_name.startswith('RedStance_'): feature_vector[f_name] = 1 if red_stats.get('Stance') == f_name.replace('RedStance_', '') else 0
+        elif f_name.startswith('BlueStance_'): feature_vector[f_name] = 1 if blue_stats.get('Stance') == f_name.replace('BlueStance_', '') else 0
+    for feature, value in feature_vector.items():
+        if feature in weights and feature in scaling_params:
+            z += weights[feature] * (value - to_float(scaling_params[feature].get('mean'))) / to_float(scaling_params[feature].get('std_dev'), default=1)
+    return 1 / (1 + math.exp(-z))
+
+def main(number=20000):
+    with contextlib.redirect_stdout(io.StringIO()): api_server.load_data()
+    state = api_server.STATE
+    stats = state.fighter_stats; model = state.model.to_dict(); compiled = state.compiled
+    random.seed(0)
+    pairs = [tuple(random.sample(list(stats), 2)) for _ in range(number)]
+    row_pairs = [(compiled.rows[r], compiled.rows[b]) for r, b in pairs]
+
+    worst = max(abs(dict_probability(stats[r], stats[b], model) - compiled.probability(rr, br)) for (r, b), (rr, br) in zip(pairs, row_pairs))
+    dict_time = timeit.timeit(lambda: [dict_probability(stats[r], stats[b], model) for r, b in pairs], number=1)
+    compiled_time = timeit.timeit(lambda: [compiled.probability(r, b) for r, b in row_pairs], number=1)
+    explain_time = timeit.timeit(lambda: [compiled.contributions(r, b) for r, b in row_pairs], number=1)
+
+    results = {
+        'pairs': number, 'max_abs_probability_diff': worst,
+        'dict_scoring_us': dict_time / number * 1e6,
+        'compiled_scoring_us': compiled_time / number * 1e6,
+        'compiled_contributions_us': explain_time / number * 1e6,
+    }
+    print(json.dumps(results, indent=4))
+    return results
+
+if __name__ == '__main__':
+    main()
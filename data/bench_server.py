@@ -0,0 +1,87 @@
+import argparse
+import http.client
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from fighter_index import load_fighter_index
+
+def wait_for_port(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1): return
+        except OSError: time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not come up within {timeout}s.")
+
+def start_server(port, workers):
+    command = [sys.executable, '-c', f'import api_server; api_server.run_server(port={port}, workers={workers})']
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return process
+
+def client_loop(port, pairs, count, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for i in range(count):
+        red, blue = random.choice(pairs)
+        body = json.dumps({'red_fighter': red, 'blue_fighter': blue})
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse(); response.read()
+            if response.will_close: conn.close()
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors.append(1); conn.close()
+    conn.close()
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_load(port, pairs, concurrency, requests_per_client):
+    latencies, errors = [], []
+    threads = [threading.Thread(target=client_loop, args=(port, pairs, requests_per_client, latencies, errors)) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies), 'errors': len(errors), 'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 99) * 1000 if latencies else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load generator for the prediction server.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', default='0,8', help="Comma-separated worker counts to compare; 0 is the single-threaded server.")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per client connection.")
+    args = parser.parse_args()
+
+    names = list(load_fighter_index())
+    random.seed(0)
+    pairs = [tuple(random.sample(names, 2)) for _ in range(500)]
+    results = {}
+    for i, workers in enumerate(int(w) for w in args.workers.split(',')):
+        # A fresh port per mode avoids colliding with the previous server's TIME_WAIT sockets.
+        port = args.port + i
+        process = start_server(port, workers)
+        try:
+            results[workers] = run_load(port, pairs, args.concurrency, args.requests)
+        finally:
+            process.terminate(); process.wait()
+        r = results[workers]
+        p50 = f"{r['p50_ms']:.2f}" if r['p50_ms'] is not None else 'n/a'
+        p99 = f"{r['p99_ms']:.2f}" if r['p99_ms'] is not None else 'n/a'
+        print(f"workers={workers:<3} requests={r['requests']:<6} errors={r['errors']:<4} rps={r['rps']:8.1f} p50={p50}ms p99={p99}ms")
+    return results
+
+if __name__ == '__main__':
+    main()
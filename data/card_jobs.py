@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dataset import JsonArrayWriter
+from fighter_index import STAT_FIELDS, FighterTable
+from metrics import METRICS
+from scoring import compile_model, input_fields
+
+OUTPUT_DIR = 'card_predictions'
+NAME_COLUMNS = {'RedFighter', 'BlueFighter'}
+
+log = logging.getLogger('card_jobs')
+
+def parse_card(body, content_type=''):
+    """A card upload as (header, rows of strings). CSV is the upcoming.csv layout; JSON is a list of fights
+    (or {"fights": [...]}) holding either the same columns or just red_fighter / blue_fighter."""
+    text = body.decode('utf-8-sig') if isinstance(body, bytes) else body
+    if 'csv' in content_type or not text.lstrip().startswith(('[', '{')):
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, None) or []
+        rows = [row for row in reader if row]
+    else:
+        fights = json.loads(text)
+        if isinstance(fights, dict): fights = fights.get('fights', [])
+        if not isinstance(fights, list) or not all(isinstance(f, dict) for f in fights): raise ValueError("A JSON card must be a list of fight objects.")
+        fights = [dict(f, RedFighter=f.get('RedFighter', f.get('red_fighter', '')), BlueFighter=f.get('BlueFighter', f.get('blue_fighter', ''))) for f in fights]
+        header = list(dict.fromkeys(k for f in fights for k in f if k not in ('red_fighter', 'blue_fighter')))
+        rows = [['' if f.get(k) is None else str(f.get(k)) for k in header] for f in fights]
+    if not NAME_COLUMNS <= set(header): raise ValueError("A card needs RedFighter and BlueFighter (or red_fighter and blue_fighter) for every fight.")
+    return header, rows
+
+def corner_column(corner, field):
+    # upcoming.csv spells the rank columns RMatchWCRank / BMatchWCRank and every other stat RedX / BlueX.
+    return f'{corner[0]}{field}' if field == 'MatchWCRank' else f'{corner}{field}'
+
+def input_columns(model):
+    return {corner_column(corner, field) for field in input_fields(model) for corner in ('Red', 'Blue')}
+
+def scores_from_columns(header, model):
+    """True when a card carries both corners' stats for every field the model reads, False when it carries
+    none of them (names only).
+
+    A card with only some of them would silently score the rest as 0, so it raises ValueError.
+    """
+    columns = input_columns(model)
+    if not set(header) & columns: return False
+    missing = sorted(columns - set(header))
+    if missing: raise ValueError(f"The card has some fighter stat columns but not {', '.join(missing)}; send every model input or fighter names only.")
+    return True
+
+def card_fighters(header, rows):
+    """Each fight's two corners as one-off fighters, red at row 2i and blue at 2i + 1, so a stat-column card is
+    scored by the same CompiledModel (and sign convention) as fighters looked up by name."""
+    index = {name: i for i, name in enumerate(header)}
+    cell = lambda row, column: row[index[column]] if column in index and index[column] < len(row) else ''
+    fighters = {}
+    for i, row in enumerate(rows):
+        for corner in ('Red', 'Blue'):
+            fighters[(i, corner)] = {field: cell(row, corner_column(corner, field)) for field in STAT_FIELDS}
+    return FighterTable.from_mapping(fighters)
+
+def prediction_entry(red, blue, prediction_prob):
+    red_wins = prediction_prob >= 0.5
+    confidence = prediction_prob if red_wins else 1 - prediction_prob
+    return {'RedFighter': red, 'BlueFighter': blue, 'PredictedWinner': red if red_wins else blue, 'Confidence': f"{confidence * 100:.2f}%"}
+
+class CardJob:
+    """One queued card. Results grow as chunks are scored; readers wait on `changed` for more."""
+    def __init__(self, job_id, header, rows, state):
+        self.id = job_id
+        self.header = header
+        self.rows = rows
+        self.state = state
+        self.status = 'queued'
+        self.results = []
+        self.output = None
+        self.error = None
+        self.created = time.time()
+        self.started = self.finished = None
+        self.changed = threading.Condition()
+
+    @property
+    def done(self): return self.status in ('done', 'failed')
+
+    def summary(self, offset=0):
+        with self.changed:
+            return {'job_id': self.id, 'status': self.status, 'model_version': self.state.version, 'total': len(self.rows),
+                    'completed': len(self.results), 'created': self.created, 'started': self.started, 'finished': self.finished,
+                    'output': self.output, 'error': self.error, 'offset': offset, 'results': self.results[offset:]}
+
+    def wait(self, seen, timeout=None):
+        """Blocks until there are results past `seen` or the job has finished; returns (new results, done)."""
+        with self.changed:
+            self.changed.wait_for(lambda: len(self.results) > seen or self.done, timeout)
+            return self.results[seen:], self.done
+
+    def _publish(self, results=(), **fields):
+        with self.changed:
+            self.results.extend(results)
+            for name, value in fields.items(): setattr(self, name, value)
+            self.changed.notify_all()
+
+class JobQueue:
+    """Scores uploaded cards on its own small thread pool, so a long card never holds an HTTP worker.
+
+    Each job scores against the ServingState it was submitted with, a few fights at a time, and streams its
+    predictions into `<output_dir>/<job id>-<model version>.json`, renamed into place only once complete.
+    """
+    def __init__(self, workers=2, output_dir=OUTPUT_DIR, max_jobs=200, chunk_size=64):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='card-worker')
+        self.output_dir = output_dir
+        self.max_jobs = max_jobs
+        self.chunk_size = chunk_size
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, header, rows, state):
+        job = CardJob(uuid.uuid4().hex[:16], header, rows, state)
+        with self.lock:
+            self.jobs[job.id] = job
+            # Forget the oldest finished jobs; their output files stay on disk.
+            for old_id in [i for i, j in self.jobs.items() if j.done][:max(0, len(self.jobs) - self.max_jobs)]: del self.jobs[old_id]
+        METRICS.increment('card_jobs:submitted')
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock: return self.jobs.get(job_id)
+
+    def _scores(self, job):
+        # Cards carrying fighter stats (the upcoming.csv layout) are scored from those columns; name-only cards
+        # use each fighter's latest stats from the serving state. Both go through one CompiledModel path.
+        from_columns = scores_from_columns(job.header, job.state.model)
+        compiled = job.state.compiled
+        red_col, blue_col = job.header.index('RedFighter'), job.header.index('BlueFighter')
+        for start in range(0, len(job.rows), self.chunk_size):
+            rows = job.rows[start:start + self.chunk_size]
+            names = [(row[red_col].strip(), row[blue_col].strip()) for row in rows]
+            if from_columns:
+                probabilities = compile_model(job.state.model, card_fighters(job.header, rows)).probabilities(np.arange(0, 2 * len(rows), 2), np.arange(1, 2 * len(rows), 2))
+                yield [prediction_entry(red, blue, p) for (red, blue), p in zip(names, probabilities.tolist())]
+                continue
+            found = [i for i, (red, blue) in enumerate(names) if red in compiled.rows and blue in compiled.rows]
+            probabilities = compiled.probabilities(np.array([compiled.rows[names[i][0]] for i in found], dtype=np.intp),
+                                                   np.array([compiled.rows[names[i][1]] for i in found], dtype=np.intp)).tolist() if found else []
+            chunk = [{'RedFighter': red, 'BlueFighter': blue, 'error': 'One or both fighters not found.'} for red, blue in names]
+            for i, p in zip(found, probabilities): chunk[i] = prediction_entry(*names[i], p)
+            yield chunk
+
+    def _run(self, job):
+        job._publish(status='running', started=time.time())
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'{job.id}-{job.state.version}.json')
+        try:
+            with METRICS.timer('stage:card_job'), JsonArrayWriter(path) as writer:
+                for chunk in self._scores(job):
+                    for entry in chunk: writer.write(entry)
+                    job._publish(chunk)
+                    # Hand the interpreter back between chunks so /predict threads are never starved.
+                    time.sleep(0)
+        except Exception as e:
+            log.exception("Card job %s failed.", job.id)
+            METRICS.increment('card_jobs:failed')
+            job._publish(status='failed', error=str(e), finished=time.time())
+            return
+        METRICS.increment('card_jobs:completed')
+        job._publish(status='done', output=path, finished=time.time())
+
+    def shutdown(self):
+        # Queued cards are dropped; cards already running finish and are written out.
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,107 @@
+import csv
+import json
+import os
+import numpy as np
+
+MAGIC = b'\x93NUMPY\x01\x00'
+# Large enough that the real row count always fits in the header written up front.
+PLACEHOLDER_ROWS = 10 ** 15
+
+def _npy_header(dtype, rows, length=None):
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (rows,)})
+    if length is None:
+        length = len(header) + 1
+        length += -(len(MAGIC) + 2 + length) % 64
+    return MAGIC + length.to_bytes(2, 'little') + header.ljust(length - 1).encode('latin1') + b'\n'
+
+class NpyStreamWriter:
+    """Appends float64 rows to a structured .npy file in bounded memory.
+
+    Column names live in the dtype, so readers get names and a memory-mappable matrix from one file.
+    The header is written with a placeholder row count and patched in place on close.
+    """
+    def __init__(self, path, columns, chunk_rows=8192):
+        self.path = path
+        self.columns = list(columns)
+        self.dtype = np.dtype([(c, np.float64) for c in self.columns])
+        self.chunk = np.empty((chunk_rows, len(self.columns)), dtype=np.float64)
+        self.pending = 0
+        self.rows = 0
+        self.tmp_path = f'{path}.tmp'
+        self.file = open(self.tmp_path, 'wb')
+        self.header_length = len(_npy_header(self.dtype, PLACEHOLDER_ROWS)) - len(MAGIC) - 2
+        self.file.write(_npy_header(self.dtype, PLACEHOLDER_ROWS))
+
+    def write(self, values):
+        self.chunk[self.pending] = values
+        self.pending += 1
+        if self.pending == len(self.chunk): self._flush()
+
+    def _flush(self):
+        self.chunk[:self.pending].tofile(self.file)
+        self.rows += self.pending
+        self.pending = 0
+
+    def close(self):
+        self._flush()
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, self.rows, self.header_length))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.close()
+        else: self.file.close(); os.remove(self.tmp_path)
+
+class JsonArrayWriter:
+    """Writes a JSON array one item at a time, byte-identical to json.dump(items, f, indent=4).
+
+    Like NpyStreamWriter it writes to `<path>.tmp` and renames on a clean close.
+    """
+    def __init__(self, path, indent=4):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        self.tmp_path = f'{path}.tmp'
+        self.file = open(self.tmp_path, 'w')
+
+    def write(self, item):
+        text = json.dumps(item, indent=self.indent).replace('\n', '\n' + ' ' * self.indent)
+        self.file.write(('[\n' if self.count == 0 else ',\n') + ' ' * self.indent + text)
+        self.count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.close()
+        else: self.file.close(); os.remove(self.tmp_path)
+
+def load_npy_table(path):
+    """Memory-maps a structured .npy file as (columns, 2-D float64 matrix view)."""
+    table = np.load(path, mmap_mode='r')
+    columns = list(table.dtype.names)
+    if len(table) == 0: return columns, np.empty((0, len(columns)))
+    return columns, table.view(np.float64).reshape(len(table), len(columns))
+
+def _parse_cell(value):
+    try: return float(value)
+    except (ValueError, TypeError): return np.nan
+
+def load_csv_table(path):
+    with open(path, 'r') as infile:
+        reader = csv.reader(infile)
+        columns = next(reader, None) or []
+        rows = [[_parse_cell(cell) for cell in row] for row in reader if row]
+    return columns, np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+
+def load_table(name):
+    """Loads `<name>.npy` when it is at least as new as `<name>.csv`, else parses the CSV. Unparseable cells are NaN."""
+    npy_path, csv_path = f'{name}.npy', f'{name}.csv'
+    if os.path.exists(npy_path) and (not os.path.exists(csv_path) or os.path.getmtime(npy_path) >= os.path.getmtime(csv_path)):
+        return load_npy_table(npy_path)
+    return load_csv_table(csv_path)
@@ -1,65 +1,44 @@
-
-import csv
+import argparse
 import json
-import math
+import os
+from batch_scoring import format_report, resolve_table, score_file
+from model_artifact import ModelArtifactError, load_model
 
-def evaluate_model():
+def evaluate_model(table='testing', chunk_rows=65536, report_path=None):
     # Load the model
     try:
-        with open('model.json', 'r') as infile:
-            model = json.load(infile)
+        model = load_model()
     except FileNotFoundError:
         print("Error: model.json not found. Please train the model first.")
         return
-    
-    weights = model['weights']
-    bias = model['bias']
-    scaling_params = model['scaling_params']
-
-    # Read testing data
-    try:
-        with open('testing.csv', 'r') as infile:
-            reader = csv.DictReader(infile)
-            data = list(reader)
-            if not data:
-                print("Testing data is empty.")
-                return
-    except FileNotFoundError:
-        print("Error: testing.csv not found.")
+    except ModelArtifactError as e:
+        print(f"Error: {e}")
         return
 
-    features = [h for h in data[0].keys() if h != 'Winner']
-    
-    correct_predictions = 0
-    total_predictions = len(data)
-
-    for row in data:
-        z = bias
-        for feature in features:
-            if feature in scaling_params and row.get(feature):
-                try:
-                    scaled_value = (float(row[feature]) - scaling_params[feature]['mean']) / scaling_params[feature]['std_dev']
-                    z += weights[feature] * scaled_value
-                except (ValueError, TypeError, KeyError):
-                    # This can happen if a feature in the test set wasn't in the training set (e.g., a new stance)
-                    continue
-        
-        z = max(-100, min(100, z))
-        prediction_prob = 1 / (1 + math.exp(-z))
-        
-        prediction = 1 if prediction_prob >= 0.5 else 0
-        
-        try:
-            actual = int(row['Winner'])
-            if prediction == actual:
-                correct_predictions += 1
-        except (ValueError, TypeError):
-            print(f"Warning: Could not convert Winner ' {row['Winner']} ' to int.")
-            total_predictions -= 1 # Don't count this row in accuracy calculation
+    # testing.npy is memory-mapped when present; any raw fight CSV with a Winner column also works,
+    # and one that carries RedOdds/BlueOdds gets an ROI figure too.
+    path = resolve_table(table)
+    if not os.path.exists(path):
+        print(f"Error: {path} not found.")
+        return
+    report = score_file(model, path, chunk_rows)
+    if report['labeled'] == 0:
+        print("Testing data is empty.")
+        return
+    if report['labeled'] < report['rows']:
+        print(f"Warning: Skipped {report['rows'] - report['labeled']} rows without a Red/Blue winner.")
 
-    accuracy = (correct_predictions / total_predictions) * 100 if total_predictions > 0 else 0
-    
-    print(f"Model Accuracy on the test set: {accuracy:.2f}%")
+    print(f"Model Accuracy on the test set: {report['accuracy'] * 100:.2f}%")
+    print(format_report(report))
+    if report_path:
+        with open(report_path, 'w') as outfile:
+            json.dump(report, outfile, indent=4)
+    return report
 
 if __name__ == '__main__':
-    evaluate_model()
+    parser = argparse.ArgumentParser(description="Score a labeled table with model.json and report accuracy, log-loss, Brier score, calibration and ROI.")
+    parser.add_argument('table', nargs='?', default='testing', help="Table name (testing -> testing.npy/.csv) or a CSV/.npy path, e.g. ufc-master.csv.")
+    parser.add_argument('--chunk-rows', type=int, default=65536)
+    parser.add_argument('--report', help="Also write the metrics as JSON to this path.")
+    args = parser.parse_args()
+    evaluate_model(args.table, args.chunk_rows, args.report)
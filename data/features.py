@@ -0,0 +1,23 @@
+# Feature definitions and value parsing shared by the training pipeline and the serving code.
+
+# Define all the attributes we want to find the difference for.
+# The key is the new feature name, the value is the base attribute name.
+diff_map = {
+    'HeightDif': 'HeightDif', 'ReachDif': 'ReachDif', 'AgeDif': 'AgeDif',
+    'LossDif': 'Losses', 'SigStrDif': 'AvgSigStrLanded', 'AvgTDDif': 'AvgTDLanded',
+    'TotalRoundDif': 'TotalRoundDif', 'TotalTitleBoutDif': 'TotalTitleBoutDif',
+    'WeightDif': 'WeightLbs', 'AvgSigStrPctDif': 'AvgSigStrPct', 'AvgTDPctDif': 'AvgTDPct',
+    'AvgSubAttDif': 'AvgSubAtt', 'WinsDif': 'Wins', 'OddsDif': 'Odds'
+}
+# The corner attribute behind each precomputed ufc-master difference that diff_map reads as is. ufc-master
+# computes them Blue minus Red, so serving code engineering them from fighter stats must do the same.
+PRECOMPUTED_DIFFS = {'HeightDif': 'HeightCms', 'ReachDif': 'ReachCms', 'AgeDif': 'Age', 'TotalRoundDif': 'TotalRoundsFought', 'TotalTitleBoutDif': 'TotalTitleBouts'}
+
+def get_rank(rank_str, unranked_value=20):
+    if rank_str == 'C': return 0
+    try: return float(rank_str)
+    except (ValueError, TypeError): return unranked_value
+
+def to_float(value, default=0.0):
+    try: return float(value)
+    except (ValueError, TypeError): return default
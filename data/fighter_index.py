@@ -0,0 +1,393 @@
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+import numpy as np
+from features import get_rank
+
+INDEX_PATH = 'fighter_index.sqlite'
+INDEX_VERSION = '3'
+# Bytes hashed at each end of the indexed rows, enough to recognise them inside a grown source.
+WINDOW_BYTES = 1 << 16
+
+# Per-fighter columns copied from the fighter's corner of a fight.
+CORNER_FIELDS = [
+    'HeightCms', 'ReachCms', 'Age', 'Stance', 'CurrentWinStreak', 'Losses', 'AvgSigStrLanded',
+    'AvgTDLanded', 'TotalRoundsFought', 'TotalTitleBouts', 'AvgSigStrPct', 'AvgTDPct', 'AvgSubAtt',
+    'Wins', 'Odds', 'WeightLbs'
+]
+STAT_FIELDS = ['WeightClass', 'MatchWCRank'] + CORNER_FIELDS
+# Stats kept as text; every other stat field is numeric.
+STRING_FIELDS = ['WeightClass', 'MatchWCRank', 'Stance']
+RECORD_FIELDS = ['Name'] + STAT_FIELDS + ['RankedWins']
+# The source columns apply_fights reads; the remaining ~75 columns of a row only feed its digest.
+FIGHT_COLUMNS = ['Date', 'RedFighter', 'BlueFighter', 'Winner', 'WeightClass', 'RMatchWCRank', 'BMatchWCRank'] + [f'{corner}{field}' for corner in ('Red', 'Blue') for field in CORNER_FIELDS]
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+def fight_key(row):
+    return f"{row['Date']}|{row['RedFighter'].strip()}|{row['BlueFighter'].strip()}"
+
+def row_digest(row):
+    return hashlib.sha1('\x1f'.join(row.values()).encode()).hexdigest()
+
+def _fights(header, lines):
+    positions = [(column, header.index(column)) for column in FIGHT_COLUMNS if column in header]
+    for row in csv.reader(lines):
+        if not row: continue
+        fight = {column: row[i] for column, i in positions}
+        # Same digest row_digest gives the DictReader row.
+        fight['row_hash'] = hashlib.sha1('\x1f'.join(row).encode()).hexdigest()
+        yield fight
+
+def _read_header(f):
+    line = f.readline()
+    return line, next(csv.reader([line.decode()]), [])
+
+def read_fights(source):
+    """Yields each fight in `source` holding only FIGHT_COLUMNS, plus the digest of the full row under
+    'row_hash', so building the index never holds whole rows in memory."""
+    with open(source, 'rb') as f:
+        _, header = _read_header(f)
+        yield from _fights(header, io.TextIOWrapper(f, encoding='utf-8', newline=''))
+
+def in_date_order(rows):
+    # The source is newest-first. Reversing before the stable date sort keeps same-day fights in
+    # reverse source order, so the row listed first in the source is applied last and wins ties.
+    rows = list(rows)
+    rows.reverse()
+    rows.sort(key=lambda row: row['Date'])
+    return rows
+
+def _create_schema(conn):
+    stat_columns = ', '.join(f'{field} TEXT' for field in STAT_FIELDS)
+    conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+    conn.execute('CREATE TABLE fights (fight_key TEXT PRIMARY KEY, date TEXT, row_hash TEXT)')
+    # One row per fighter per fight: the stats they brought into that fight.
+    conn.execute(f'CREATE TABLE snapshots (fighter TEXT, date TEXT, fight_key TEXT, {stat_columns}, ranked_wins_before INTEGER, ranked_win INTEGER, seq INTEGER, PRIMARY KEY (fighter, date, fight_key))')
+    # The latest snapshot per fighter plus running totals; `recency` is that snapshot's seq.
+    conn.execute(f'CREATE TABLE fighters (Name TEXT PRIMARY KEY, {stat_columns}, RankedWins INTEGER, last_date TEXT, recency INTEGER)')
+
+def apply_fights(conn, rows):
+    """Folds fights (already in date order) into the store, touching only the fighters involved.
+
+    Running totals are only right when no fight predates what the store has already seen; callers
+    rebuild from scratch instead in that case.
+    """
+    touched = {}
+    recency = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM snapshots').fetchone()[0]
+    snapshot_sql = f'INSERT OR REPLACE INTO snapshots VALUES ({", ".join("?" * (len(STAT_FIELDS) + 6))})'
+    applied = 0
+    for row in rows:
+        key = fight_key(row)
+        conn.execute('INSERT OR REPLACE INTO fights VALUES (?, ?, ?)', (key, row['Date'], row.get('row_hash') or row_digest(row)))
+        applied += 1
+        for corner, opponent_rank in (('Blue', 'RMatchWCRank'), ('Red', 'BMatchWCRank')):
+            name = row[f'{corner}Fighter'].strip()
+            if not name: continue
+            fighter = touched.get(name)
+            if fighter is None:
+                stored = conn.execute(f'SELECT {", ".join(STAT_FIELDS)}, RankedWins, last_date, recency FROM fighters WHERE Name = ?', (name,)).fetchone()
+                if stored: fighter = {'stats': dict(zip(STAT_FIELDS, stored[:-3])), 'ranked_wins': stored[-3], 'last_date': stored[-2], 'recency': stored[-1]}
+                else: fighter = {'stats': None, 'ranked_wins': 0, 'last_date': '', 'recency': 0}
+                touched[name] = fighter
+            stats = {'WeightClass': row['WeightClass'], 'MatchWCRank': row['RMatchWCRank' if corner == 'Red' else 'BMatchWCRank']}
+            for field in CORNER_FIELDS: stats[field] = row[f'{corner}{field}']
+            ranked_win = 1 if row['Winner'] == corner and get_rank(row[opponent_rank]) <= 15 else 0
+            recency += 1
+            conn.execute(snapshot_sql, (name, row['Date'], key, *(stats[f] for f in STAT_FIELDS), fighter['ranked_wins'], ranked_win, recency))
+            fighter['ranked_wins'] += ranked_win
+            if row['Date'] >= fighter['last_date']:
+                fighter.update(stats=stats, last_date=row['Date'], recency=recency)
+    conn.executemany(f'INSERT OR REPLACE INTO fighters VALUES ({", ".join("?" * (len(STAT_FIELDS) + 4))})', (
+        (name, *(f['stats'][field] for field in STAT_FIELDS), f['ranked_wins'], f['last_date'], f['recency']) for name, f in touched.items()
+    ))
+    return applied
+
+def _window_digests(f, start, end):
+    # Hashes of the first and last WINDOW_BYTES of f[start:end].
+    f.seek(start)
+    head = hashlib.sha256(f.read(min(WINDOW_BYTES, end - start))).hexdigest()
+    tail_start = max(start, end - WINDOW_BYTES)
+    f.seek(tail_start)
+    return head, hashlib.sha256(f.read(end - tail_start)).hexdigest()
+
+def _source_meta(f, header_line, digest):
+    """Meta for the indexed source: where its rows are and how to recognise them once the file grows."""
+    stat = os.fstat(f.fileno())
+    head, tail = _window_digests(f, len(header_line), stat.st_size)
+    return {
+        'version': INDEX_VERSION, 'source_mtime_ns': str(stat.st_mtime_ns), 'source_size': str(stat.st_size),
+        'source_sha256': digest, 'header_sha256': hashlib.sha256(header_line).hexdigest(),
+        'body_bytes': str(stat.st_size - len(header_line)), 'body_head_sha256': head, 'body_tail_sha256': tail,
+    }
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    # WAL lets the server keep reading while an append commits.
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+def _write_meta(conn, meta):
+    conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', meta.items())
+
+def build_index(source='ufc-master.csv', path=INDEX_PATH):
+    with open(source, 'rb') as f:
+        meta = _source_meta(f, f.readline(), file_digest(source))
+    tmp_path = f'{path}.tmp'
+    if os.path.exists(tmp_path): os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        _create_schema(conn)
+        # Fights are staged in SQLite and read back in date order, so memory stays flat however long
+        # the history is. Sorting on (Date, pos DESC) is the order in_date_order gives.
+        columns = ['pos', 'row_hash'] + FIGHT_COLUMNS
+        conn.execute(f'CREATE TEMP TABLE staged ({", ".join(columns)})')
+        conn.executemany(f'INSERT INTO staged VALUES ({", ".join("?" * len(columns))})', (
+            (pos, fight['row_hash'], *(fight[column] for column in FIGHT_COLUMNS)) for pos, fight in enumerate(read_fights(source))
+        ))
+        cursor = conn.execute('SELECT * FROM staged ORDER BY Date, pos DESC')
+        apply_fights(conn, (dict(zip(columns, row)) for row in cursor))
+        meta['max_date'] = conn.execute("SELECT COALESCE(MAX(Date), '') FROM staged").fetchone()[0]
+        conn.execute('DROP TABLE staged')
+        conn.execute('CREATE INDEX snapshots_by_date ON snapshots (date)')
+        _write_meta(conn, meta)
+        conn.commit()
+    finally:
+        conn.close()
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix): os.remove(path + suffix)
+    os.replace(tmp_path, path)
+    return meta
+
+def append_fights(rows, path=INDEX_PATH):
+    """Applies a new event's fights directly. Raises ValueError if any fight predates the index.
+
+    source_sha256 is chained over the new fights in the same transaction, so the data version the
+    server keys its cache and matchup table on moves with them.
+    """
+    rows = in_date_order(rows)
+    conn = _connect(path)
+    try:
+        meta = dict(conn.execute('SELECT key, value FROM meta'))
+        watermark = meta.get('max_date', '')
+        if rows and rows[0]['Date'] < watermark:
+            raise ValueError(f"Fight dated {rows[0]['Date']} is older than the index watermark {watermark}; rebuild instead.")
+        applied = apply_fights(conn, rows)
+        if rows:
+            added = '\n'.join(row.get('row_hash') or row_digest(row) for row in rows).encode()
+            _write_meta(conn, {'max_date': max(watermark, rows[-1]['Date']), 'source_sha256': hashlib.sha256(f"{meta.get('source_sha256', '')}:".encode() + added).hexdigest()})
+        conn.commit()
+        return applied
+    finally:
+        conn.close()
+
+def _new_rows_span(f, header_line, meta):
+    """Byte span (start, end, at_top) of the rows added since `meta` was written, or None when the
+    indexed rows are no longer intact at either the end or the top of the body."""
+    size = os.fstat(f.fileno()).st_size
+    if hashlib.sha256(header_line).hexdigest() != meta['header_sha256']: return None
+    body_start, old_bytes = len(header_line), int(meta['body_bytes'])
+    if size - body_start < old_bytes: return None
+    fingerprint = (meta['body_head_sha256'], meta['body_tail_sha256'])
+    # The source is newest-first, so new events normally land right after the header; appending at
+    # the end is accepted too.
+    if _window_digests(f, size - old_bytes, size) == fingerprint: return body_start, size - old_bytes, True
+    if _window_digests(f, body_start, body_start + old_bytes) == fingerprint: return body_start + old_bytes, size, False
+    return None
+
+def update_index(source='ufc-master.csv', path=INDEX_PATH):
+    """Applies only the fights added to `source` since the index was last written and returns the new
+    meta, or None when a rebuild is needed.
+
+    The indexed rows are recognised by their byte length and a hash of each end, so an update reads
+    the header, those two windows and the new rows, never the whole history. It falls back to a
+    rebuild when the header or the indexed rows moved, a new fight is already indexed, or a new fight
+    predates the newest indexed one. An edit deep inside the indexed rows that keeps their length is
+    not seen; `python fighter_index.py` rebuilds from scratch.
+    """
+    meta = _read_meta(path)
+    if meta is None or meta.get('version') != INDEX_VERSION: return None
+    with open(source, 'rb') as f:
+        header_line, header = _read_header(f)
+        span = _new_rows_span(f, header_line, meta)
+        if span is None: return None
+        start, end, at_top = span
+        f.seek(start)
+        added = f.read(end - start)
+        rows = list(_fights(header, io.StringIO(added.decode('utf-8'), newline='')))
+        # Chaining keeps source_sha256 a fingerprint of every byte indexed without rehashing the file.
+        digest = hashlib.sha256(f"{meta['source_sha256']}:".encode() + added).hexdigest() if added else meta['source_sha256']
+        new_meta = _source_meta(f, header_line, digest)
+    watermark = meta.get('max_date', '')
+    # A same-day fight listed below the indexed rows would have been applied before them in a rebuild.
+    if any(row['Date'] < watermark or (row['Date'] == watermark and not at_top) for row in rows): return None
+    conn = _connect(path)
+    try:
+        keys = [fight_key(row) for row in rows]
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            if conn.execute(f'SELECT 1 FROM fights WHERE fight_key IN ({", ".join("?" * len(chunk))}) LIMIT 1', chunk).fetchone(): return None
+        rows = in_date_order(rows)
+        apply_fights(conn, rows)
+        new_meta['max_date'] = max(watermark, rows[-1]['Date']) if rows else watermark
+        _write_meta(conn, new_meta)
+        conn.commit()
+        return new_meta
+    finally:
+        conn.close()
+
+def _read_meta(path):
+    if not os.path.exists(path): return None
+    try:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try: return dict(conn.execute('SELECT key, value FROM meta'))
+        finally: conn.close()
+    except sqlite3.DatabaseError:
+        return None
+
+def parse_numeric(values):
+    """Text column -> float64 array with NaN for blank or unparseable cells."""
+    try: return np.array([v or 'nan' for v in values], dtype=np.float64)
+    except ValueError:
+        out = np.empty(len(values))
+        for i, v in enumerate(values):
+            try: out[i] = float(v)
+            except (ValueError, TypeError): out[i] = np.nan
+        return out
+
+class FighterRecord(Mapping):
+    """One fighter's stats as a read-only view onto a FighterTable row; keys are RECORD_FIELDS.
+    Numeric stats come back as floats (None when blank), text stats as stored."""
+    __slots__ = ('table', 'id')
+
+    def __init__(self, table, fighter_id):
+        self.table = table
+        self.id = fighter_id
+
+    def __getitem__(self, field): return self.table.value(self.id, field)
+    def __iter__(self): return iter(RECORD_FIELDS)
+    def __len__(self): return len(RECORD_FIELDS)
+    def __repr__(self): return f'FighterRecord({dict(self)!r})'
+
+class FighterTable(Mapping):
+    """Fighters as columns indexed by fighter id, most recently active first; maps name -> FighterRecord.
+
+    Text columns are kept as read. A numeric column is parsed once, the first time anything asks for
+    it, and its text is then dropped, so stats the model never uses are never parsed.
+    """
+    def __init__(self, names, columns, ranked_wins):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.ranked_wins = list(ranked_wins)
+        self._text = dict(columns)
+        self._numeric = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_mapping(cls, fighter_stats):
+        """A FighterTable from any {name: stats} mapping, e.g. the plain dicts callers built before the
+        index returned tables. A FighterTable comes back unchanged. Missing stats read as blank."""
+        if isinstance(fighter_stats, cls): return fighter_stats
+        names = list(fighter_stats)
+        columns = {field: ['' if fighter_stats[name].get(field) is None else str(fighter_stats[name].get(field)) for name in names] for field in STAT_FIELDS}
+        return cls(names, columns, [fighter_stats[name].get('RankedWins') or 0 for name in names])
+
+    def __getitem__(self, name): return FighterRecord(self, self.ids[name])
+    def __iter__(self): return iter(self.names)
+    def __len__(self): return len(self.names)
+    def __contains__(self, name): return name in self.ids
+
+    def strings(self, field):
+        return self._text[field]
+
+    def numeric(self, field):
+        column = self._numeric.get(field)
+        if column is None:
+            with self._lock:
+                column = self._numeric.get(field)
+                if column is None: column = self._numeric[field] = parse_numeric(self._text.pop(field))
+        return column
+
+    def value(self, fighter_id, field):
+        if field == 'Name': return self.names[fighter_id]
+        if field == 'RankedWins': return self.ranked_wins[fighter_id]
+        if field in STRING_FIELDS: return self._text[field][fighter_id]
+        if field not in STAT_FIELDS: raise KeyError(field)
+        value = float(self.numeric(field)[fighter_id])
+        return None if value != value else value
+
+def read_fighter_index(path=INDEX_PATH, as_of=None):
+    """Returns a FighterTable (name -> stats), most recently active first.
+
+    With `as_of` (YYYY-MM-DD) each fighter gets the stats they brought into their last fight on or
+    before that date, and RankedWins counts only fights strictly before it.
+    """
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        if as_of is None:
+            cursor = conn.execute(f'SELECT Name, {", ".join(STAT_FIELDS)}, RankedWins FROM fighters ORDER BY recency DESC')
+        else:
+            columns = ', '.join(f's.{field}' for field in STAT_FIELDS)
+            cursor = conn.execute(f'''
+                SELECT s.fighter, {columns}, s.ranked_wins_before + (CASE WHEN s.date < ? THEN s.ranked_win ELSE 0 END)
+                FROM snapshots s
+                WHERE s.date = (SELECT MAX(date) FROM snapshots WHERE fighter = s.fighter AND date <= ?)
+                ORDER BY s.seq DESC''', (as_of, as_of))
+        # A fighter with two fights on the as-of day matches twice; keep their latest snapshot.
+        seen = set()
+        rows = [row for row in cursor if not (row[0] in seen or seen.add(row[0]))]
+        columns = list(zip(*rows)) or [()] * (len(STAT_FIELDS) + 2)
+        return FighterTable(columns[0], zip(STAT_FIELDS, columns[1:-1]), columns[-1])
+    finally:
+        conn.close()
+
+def stats_as_of(name, date, path=INDEX_PATH):
+    """One fighter's stats as they stood on `date` as a FighterRecord, or None if they had not fought by then."""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        row = conn.execute(f'SELECT date, {", ".join(STAT_FIELDS)}, ranked_wins_before, ranked_win FROM snapshots WHERE fighter = ? AND date <= ? ORDER BY date DESC, seq DESC LIMIT 1', (name, date)).fetchone()
+    finally:
+        conn.close()
+    if row is None: return None
+    ranked_wins = row[-2] + (row[-1] if row[0] < date else 0)
+    return FighterTable([name], ((field, (value,)) for field, value in zip(STAT_FIELDS, row[1:-2])), [ranked_wins])[name]
+
+def ensure_index(source='ufc-master.csv', path=INDEX_PATH):
+    """Returns the index metadata, applying only the fights added since the last run when the source
+    CSV has grown and rebuilding when anything already indexed changed."""
+    meta = _read_meta(path)
+    if not os.path.exists(source):
+        if meta is None: raise FileNotFoundError(f"Neither {source} nor a fighter index at {path} exists.")
+        return meta
+    if meta is None or meta.get('version') != INDEX_VERSION:
+        return build_index(source, path)
+    stat = os.stat(source)
+    if meta.get('source_mtime_ns') == str(stat.st_mtime_ns) and meta.get('source_size') == str(stat.st_size):
+        return meta
+    return update_index(source, path) or build_index(source, path)
+
+def load_fighter_index(source='ufc-master.csv', path=INDEX_PATH, as_of=None):
+    ensure_index(source, path)
+    return read_fighter_index(path, as_of)
+
+if __name__ == '__main__':
+    import argparse, json
+    parser = argparse.ArgumentParser(description="Build the fighter state store, or look fighters up as of a date.")
+    parser.add_argument('--as-of', help="YYYY-MM-DD; print the named fighters' stats as they stood on that date.")
+    parser.add_argument('names', nargs='*')
+    args = parser.parse_args()
+    if args.as_of:
+        ensure_index()
+        records = {name: stats_as_of(name, args.as_of) for name in args.names}
+        print(json.dumps({name: record and dict(record) for name, record in records.items()}, indent=4))
+    else:
+        meta = build_index()
+        print(f"Indexed fights through {meta['max_date']} into {INDEX_PATH} (source sha256 {meta['source_sha256'][:12]}).")
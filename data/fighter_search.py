@@ -0,0 +1,89 @@
+import bisect
+import functools
+import re
+import unicodedata
+
+def normalize(text):
+    # "José Aldo" and "jose  aldo" should find the same fighter.
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FighterSearchIndex:
+    """Prefix and fuzzy name lookup over the fighter roster.
+
+    Prefix matching uses one sorted array holding every name and every word-start suffix of it, so
+    "cov" finds "Colby Covington" with a bisect. When a query has fewer than `fuzzy_below` prefix
+    matches, names sharing enough trigrams with it are ranked after them, which tolerates typos like
+    "covingtun". That depends only on the query, so every page sees the same total and order.
+    """
+    def __init__(self, fighter_stats, fuzzy_threshold=0.35, fuzzy_below=10, cache_size=4096):
+        self.names = list(fighter_stats)
+        self.weight_classes = [stats.get('WeightClass', '') for stats in fighter_stats.values()]
+        self.normalized = [normalize(name) for name in self.names]
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_below = fuzzy_below
+        self._alphabetical = tuple(sorted(range(len(self.names)), key=lambda i: self.normalized[i]))
+
+        keys = []
+        for i, name in enumerate(self.normalized):
+            words = name.split(' ')
+            # Rank 0 for a match at the start of the full name, 1 for a match at a later word.
+            for w in range(len(words)): keys.append((' '.join(words[w:]), 0 if w == 0 else 1, i))
+        keys.sort()
+        self._keys = [k[0] for k in keys]
+        self._key_entries = [(k[1], k[2]) for k in keys]
+
+        self._grams = [trigrams(name) for name in self.normalized]
+        self._postings = {}
+        for i, grams in enumerate(self._grams):
+            for gram in grams: self._postings.setdefault(gram, []).append(i)
+
+        # Autocomplete sends a query per keystroke, often repeated; answers are immutable per index.
+        self._ranked = functools.lru_cache(maxsize=cache_size)(self._ranked_uncached)
+        self._fuzzy_ranked = functools.lru_cache(maxsize=cache_size)(self._fuzzy_ranked_uncached)
+
+    def _prefix_matches(self, query):
+        best = {}
+        start = bisect.bisect_left(self._keys, query)
+        for pos in range(start, len(self._keys)):
+            if not self._keys[pos].startswith(query): break
+            rank, i = self._key_entries[pos]
+            if rank < best.get(i, 2): best[i] = rank
+        return sorted(best, key=lambda i: (best[i], self.normalized[i]))
+
+    def _fuzzy_matches(self, query, exclude):
+        query_grams = trigrams(query)
+        overlap = {}
+        for gram in query_grams:
+            for i in self._postings.get(gram, ()):
+                if i not in exclude: overlap[i] = overlap.get(i, 0) + 1
+        # Dice coefficient between the query's and the name's trigram sets.
+        scored = [(2 * n / (len(query_grams) + len(self._grams[i])), i) for i, n in overlap.items()]
+        scored = [(score, i) for score, i in scored if score >= self.fuzzy_threshold]
+        scored.sort(key=lambda item: (-item[0], self.normalized[item[1]]))
+        return [i for _, i in scored]
+
+    def _in_class(self, matches, weight_class):
+        return tuple(i for i in matches if self.weight_classes[i] == weight_class) if weight_class else tuple(matches)
+
+    def _ranked_uncached(self, query, weight_class):
+        return self._in_class(self._prefix_matches(query) if query else self._alphabetical, weight_class)
+
+    def _fuzzy_ranked_uncached(self, query, weight_class):
+        return self._in_class(self._fuzzy_matches(query, set(self._prefix_matches(query))), weight_class)
+
+    def search(self, query, weight_class=None, limit=10, offset=0, fuzzy=True):
+        """Returns {'total': n, 'results': [{'name', 'weight_class'}, ...]} for one page of ranked matches.
+
+        Fuzzy matches follow the prefix matches, and count in the total, only when the query has
+        fewer than `fuzzy_below` prefix matches, whichever page is asked for.
+        """
+        query = normalize(query or ''); weight_class = weight_class or None
+        matches = self._ranked(query, weight_class)
+        if fuzzy and query and len(matches) < self.fuzzy_below: matches += self._fuzzy_ranked(query, weight_class)
+        page = matches[offset:offset + limit]
+        return {'total': len(matches), 'results': [{'name': self.names[i], 'weight_class': self.weight_classes[i]} for i in page]}
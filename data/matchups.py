@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import numpy as np
+from fighter_index import ensure_index, read_fighter_index
+from model_artifact import load_model
+from scoring import ENGINEERING_VERSION, compile_model
+
+MATRIX_PATH = 'matchups.npy'
+MANIFEST_PATH = 'matchups.json'
+
+def data_version(model, index_meta):
+    # Identifies one model + fighter data pair; the server keys its cache and matchup table on it.
+    return hashlib.sha256(f"{model.checksum}:{index_meta['source_sha256']}:{ENGINEERING_VERSION}".encode()).hexdigest()[:16]
+
+def fighters_by_weight_class(fighter_stats):
+    classes = {}
+    for name, stats in fighter_stats.items():
+        wc = stats.get('WeightClass')
+        if wc: classes.setdefault(wc, []).append(name)
+    return classes
+
+def class_matrix(compiled, names):
+    """P(red beats blue) for every ordered pair of `names` as one matrix: the outer sum of the
+    fighters' red and blue scores, so the whole division costs a single broadcast. Values stay
+    float64, so a table read gives the same probability as CompiledModel scoring the pair."""
+    rows = np.array([compiled.rows[name] for name in names], dtype=np.intp)
+    z = compiled.bias + compiled.red_scores[rows][:, None] + compiled.blue_scores[rows][None, :]
+    with np.errstate(over='ignore'):
+        return 1 / (1 + np.exp(-np.clip(z, -100, 100)))
+
+class MatchupTable:
+    """Per-weight-class win probability matrices laid end to end in one flat float64 array.
+
+    `classes` maps a weight class to (offset, names); its matrix is data[offset:offset + n*n] as n x n,
+    with red fighters on rows and blue fighters on columns.
+    """
+    def __init__(self, classes, data, version):
+        self.version = version
+        self.data = data
+        self.classes = {}
+        self.positions = {}
+        for wc, (offset, names) in classes.items():
+            self.classes[wc] = (offset, names)
+            for i, name in enumerate(names): self.positions[name] = (wc, i)
+
+    def matrix(self, weight_class):
+        offset, names = self.classes[weight_class]
+        return self.data[offset:offset + len(names) ** 2].reshape(len(names), len(names))
+
+    def probability(self, red, blue):
+        """P(red wins) from the table, or None when the two are not in the same weight class."""
+        red_pos = self.positions.get(red); blue_pos = self.positions.get(blue)
+        if red_pos is None or blue_pos is None or red_pos[0] != blue_pos[0]: return None
+        offset, names = self.classes[red_pos[0]]
+        return float(self.data[offset + red_pos[1] * len(names) + blue_pos[1]])
+
+    def _win_rates(self, weight_class):
+        # A fighter's chance against each opponent, averaged over fighting from either corner.
+        m = self.matrix(weight_class)
+        return (m + (1 - m.T)) / 2
+
+    def _win_rate_row(self, weight_class, i):
+        # Row i of _win_rates, read straight from the table without building the n x n matrix.
+        m = self.matrix(weight_class)
+        return (m[i] + (1 - m[:, i])) / 2
+
+    def rank(self, weight_class):
+        """Fighters in a division ordered by mean win probability against everyone else in it."""
+        if weight_class not in self.classes: return None
+        names = self.classes[weight_class][1]
+        if len(names) < 2: return [{'name': name, 'expected_win_rate': None} for name in names]
+        rates = self._win_rates(weight_class)
+        np.fill_diagonal(rates, 0.0)
+        means = rates.sum(axis=1) / (len(names) - 1)
+        order = np.argsort(-means, kind='stable')
+        return [{'name': names[i], 'expected_win_rate': float(means[i])} for i in order]
+
+    def beats(self, fighter, min_probability=0.5):
+        """Division rivals favoured to beat `fighter`, most likely first."""
+        position = self.positions.get(fighter)
+        if position is None: return None
+        wc, i = position
+        names = self.classes[wc][1]
+        against = 1 - self._win_rate_row(wc, i)
+        order = [j for j in np.argsort(-against, kind='stable') if j != i and against[j] > min_probability]
+        return [{'name': names[j], 'probability': float(against[j])} for j in order]
+
+    def stats(self):
+        return {'version': self.version, 'weight_classes': len(self.classes), 'fighters': len(self.positions), 'bytes': int(self.data.nbytes)}
+
+def compute_table(compiled, fighter_stats, version):
+    classes, chunks, offset = {}, [], 0
+    for wc, names in fighters_by_weight_class(fighter_stats).items():
+        chunks.append(class_matrix(compiled, names).ravel())
+        classes[wc] = (offset, names)
+        offset += len(names) ** 2
+    data = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float64)
+    return MatchupTable(classes, data, version)
+
+def save_table(table, matrix_path=MATRIX_PATH, manifest_path=MANIFEST_PATH):
+    # The matrix goes first and the manifest last, so a reader that sees the new manifest also sees its matrix.
+    with open(f'{matrix_path}.tmp', 'wb') as f: np.save(f, table.data)
+    os.replace(f'{matrix_path}.tmp', matrix_path)
+    manifest = {'version': table.version, 'size': int(len(table.data)),
+                'classes': {wc: {'offset': offset, 'names': names} for wc, (offset, names) in table.classes.items()}}
+    with open(f'{manifest_path}.tmp', 'w') as f: json.dump(manifest, f)
+    os.replace(f'{manifest_path}.tmp', manifest_path)
+
+def load_table(version, matrix_path=MATRIX_PATH, manifest_path=MANIFEST_PATH):
+    """Memory-maps the prebuilt table if it was built for `version`; returns None when missing, stale
+    or malformed, so the caller computes it instead."""
+    try:
+        with open(manifest_path, 'r') as f: manifest = json.load(f)
+        if manifest.get('version') != version: return None
+        data = np.load(matrix_path, mmap_mode='r')
+        if data.dtype != np.float64 or data.shape != (manifest['size'],): return None
+        classes = {wc: (entry['offset'], entry['names']) for wc, entry in manifest['classes'].items()}
+    except (FileNotFoundError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return MatchupTable(classes, data, version)
+
+def build_matchups(source='ufc-master.csv'):
+    model = load_model()
+    index_meta = ensure_index(source)
+    fighter_stats = read_fighter_index()
+    version = data_version(model, index_meta)
+    table = compute_table(compile_model(model, fighter_stats), fighter_stats, version)
+    save_table(table)
+    return table
+
+if __name__ == '__main__':
+    table = build_matchups()
+    stats = table.stats()
+    print(f"Wrote {stats['weight_classes']} weight-class matrices for {stats['fighters']} fighters ({stats['bytes'] / 1e6:.1f} MB) to {MATRIX_PATH} (model version {table.version}).")
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import numpy as np
+
+ARTIFACT_PATH = 'model.bin'
+JSON_PATH = 'model.json'
+MAGIC = b'UFCMODEL'
+FORMAT_VERSION = 1
+# magic, format version, manifest length; the manifest is JSON and the payload starts on the next 16-byte boundary.
+PREFIX = struct.Struct('<8sII')
+# One read covers the header (and all of a typical model); larger payloads are memory-mapped.
+HEAD_BYTES = 1 << 16
+MMAP_BYTES = 1 << 20
+
+def stance_feature(feature):
+    """('Red', 'Orthodox') for a one-hot stance feature such as RedStance_Orthodox, else None."""
+    for corner in ('Red', 'Blue'):
+        if feature.startswith(f'{corner}Stance_'): return corner, feature[len(corner) + len('Stance_'):]
+    return None
+
+class ModelArtifactError(ValueError):
+    pass
+
+class ModelArtifact:
+    """A trained model as fixed-order float64 arrays.
+
+    `features` is the weight order and `weights` is aligned with it. `scaled` lists the features that
+    have scaling params (in model.json order), with `means` and `std_devs` aligned to it. `folded`
+    holds weight / std_dev per feature (0 for unscaled features, which never contribute) and
+    `folded_bias` the bias with every mean folded in, so z = folded_bias + x @ folded.
+    """
+    def __init__(self, features, weights, bias, scaled, means, std_devs, checksum=None, integer_std_devs=(), folded=None, folded_bias=None):
+        self.features = list(features)
+        self.weights = weights
+        self.bias = float(bias)
+        self.scaled = list(scaled)
+        self.means = means
+        self.std_devs = std_devs
+        self.integer_std_devs = set(integer_std_devs)
+        self.scale_index = {f: i for i, f in enumerate(self.scaled)}
+        if folded is None:
+            positions = [self.scale_index.get(f) for f in self.features]
+            folded = np.array([self.weights[j] / self.std_devs[i] if i is not None else 0.0 for j, i in enumerate(positions)], dtype=np.float64)
+            feature_means = np.array([self.means[i] if i is not None else 0.0 for i in positions], dtype=np.float64)
+            folded_bias = self.bias - np.dot(folded, feature_means)
+        self.folded = folded
+        self.folded_bias = float(folded_bias)
+        self.checksum = checksum or artifact_checksum(self.manifest_fields(), self._payload())
+
+    @classmethod
+    def from_dict(cls, model):
+        weights = model['weights']; scaling_params = model['scaling_params']
+        # train_model writes std_dev = 1 (an int) for constant features; remember which, so export is byte-identical.
+        integer_std_devs = [f for f, p in scaling_params.items() if isinstance(p.get('std_dev'), int)]
+        return cls(list(weights), np.array(list(weights.values()), dtype=np.float64), model['bias'], list(scaling_params),
+                   np.array([p['mean'] for p in scaling_params.values()], dtype=np.float64),
+                   np.array([p['std_dev'] for p in scaling_params.values()], dtype=np.float64), integer_std_devs=integer_std_devs)
+
+    def to_dict(self):
+        return {
+            'weights': dict(zip(self.features, self.weights.tolist())),
+            'bias': self.bias,
+            'scaling_params': {f: {'mean': m, 'std_dev': int(s) if f in self.integer_std_devs else s}
+                               for f, m, s in zip(self.scaled, self.means.tolist(), self.std_devs.tolist())},
+        }
+
+    def weight_map(self):
+        return dict(zip(self.features, self.weights.tolist()))
+
+    def scaling(self, feature):
+        """(mean, std_dev) for a scaled feature, else None."""
+        i = self.scale_index.get(feature)
+        return None if i is None else (float(self.means[i]), float(self.std_devs[i]))
+
+    def _payload(self):
+        return np.concatenate([self.weights, self.means, self.std_devs, self.folded]).astype('<f8')
+
+    def manifest_fields(self):
+        return {'features': self.features, 'scaled': self.scaled, 'bias': self.bias, 'folded_bias': self.folded_bias,
+                'integer_std_devs': sorted(self.integer_std_devs), 'dtype': '<f8'}
+
+    def manifest(self):
+        return dict(self.manifest_fields(), checksum=self.checksum)
+
+def artifact_checksum(fields, payload):
+    # Covers the manifest as well as the arrays, so it doubles as the model's identity.
+    digest = hashlib.sha256(json.dumps(fields, sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(payload, dtype='<f8').tobytes())
+    return digest.hexdigest()
+
+def save_artifact(artifact, path=ARTIFACT_PATH):
+    manifest = json.dumps(artifact.manifest(), separators=(',', ':')).encode()
+    manifest += b' ' * (-(PREFIX.size + len(manifest)) % 16)
+    # Write then rename, as with model.json, so readers only ever see a complete file.
+    with open(f'{path}.tmp', 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(manifest)))
+        f.write(manifest)
+        f.write(artifact._payload().tobytes())
+    os.replace(f'{path}.tmp', path)
+    return artifact
+
+def load_artifact(path=ARTIFACT_PATH, verify=True):
+    """Reads model.bin; payloads past MMAP_BYTES are memory-mapped instead of read. The checksum is checked unless verify=False."""
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+        if len(head) < PREFIX.size: raise ModelArtifactError(f"{path} is truncated.")
+        magic, version, manifest_length = PREFIX.unpack_from(head)
+        if magic != MAGIC: raise ModelArtifactError(f"{path} is not a model artifact.")
+        if version != FORMAT_VERSION: raise ModelArtifactError(f"{path} has format version {version}; this build reads version {FORMAT_VERSION}.")
+        offset = PREFIX.size + manifest_length
+        if len(head) < offset: head += f.read(offset - len(head))
+        try: manifest = json.loads(head[PREFIX.size:offset])
+        except ValueError as e: raise ModelArtifactError(f"{path} has a corrupt manifest: {e}")
+        n, s = len(manifest['features']), len(manifest['scaled'])
+        size = 8 * (2 * n + 2 * s)
+        if os.fstat(f.fileno()).st_size != offset + size: raise ModelArtifactError(f"{path} is truncated.")
+        if size > MMAP_BYTES: payload = np.memmap(path, dtype='<f8', mode='r', offset=offset, shape=(2 * n + 2 * s,))
+        else: payload = np.frombuffer(head[offset:] + f.read(), dtype='<f8')
+    if verify and artifact_checksum({k: v for k, v in manifest.items() if k != 'checksum'}, payload) != manifest['checksum']: raise ModelArtifactError(f"{path} failed its checksum.")
+    return ModelArtifact(manifest['features'], payload[:n], manifest['bias'], manifest['scaled'], payload[n:n + s], payload[n + s:n + 2 * s],
+                         checksum=manifest['checksum'], integer_std_devs=manifest['integer_std_devs'], folded=payload[n + 2 * s:], folded_bias=manifest['folded_bias'])
+
+def import_json(json_path=JSON_PATH, path=ARTIFACT_PATH):
+    with open(json_path, 'r') as f: return save_artifact(ModelArtifact.from_dict(json.load(f)), path)
+
+def export_json(path=ARTIFACT_PATH, json_path=JSON_PATH):
+    model = load_artifact(path).to_dict()
+    with open(f'{json_path}.tmp', 'w') as f: json.dump(model, f, indent=4)
+    os.replace(f'{json_path}.tmp', json_path)
+    return model
+
+def load_model(json_path=JSON_PATH, path=ARTIFACT_PATH):
+    """The one model loader: model.bin when it is at least as new as model.json, else model.json.
+
+    A hand-edited or freshly swept model.json therefore always wins over a stale artifact.
+    Raises FileNotFoundError when neither exists.
+    """
+    if os.path.exists(path) and (not os.path.exists(json_path) or os.path.getmtime(path) >= os.path.getmtime(json_path)):
+        return load_artifact(path)
+    with open(json_path, 'r') as f: return ModelArtifact.from_dict(json.load(f))
+
+if __name__ == '__main__':
+    # python model_artifact.py import [model.json] [model.bin] | export [model.bin] [model.json]
+    command, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ('import', [])
+    if command == 'import':
+        artifact = import_json(*args)
+        print(f"Wrote {args[1] if len(args) > 1 else ARTIFACT_PATH} ({len(artifact.features)} features, checksum {artifact.checksum[:12]}).")
+    elif command == 'export':
+        export_json(*args)
+        print(f"Wrote {args[1] if len(args) > 1 else JSON_PATH}.")
+    else:
+        sys.exit(f"Unknown command '{command}'. Use 'import' or 'export'.")
@@ -1,32 +1,19 @@
 import csv
-import random
+import hashlib
+from contextlib import ExitStack
+from dataset import NpyStreamWriter
+from features import diff_map, get_rank, to_float
 
-def get_rank(rank_str, unranked_value=20):
-    if rank_str == 'C': return 0
-    try: return float(rank_str)
-    except (ValueError, TypeError): return unranked_value
+header = ['Winner'] + list(diff_map) + ['RankDif']
+key_names = ['Date', 'RedFighter', 'BlueFighter']
 
-def to_float(value, default=0.0):
-    try: return float(value)
-    except (ValueError, TypeError): return default
-
-def prepare_and_engineer_data():
-    with open('processed_data.csv', 'r') as infile:
-        reader = csv.DictReader(infile)
-        rows = [row for row in reader if row['Winner']]
-
-    engineered_rows = []
-    
-    # Define all the attributes we want to find the difference for.
-    # The key is the new feature name, the value is the base attribute name.
-    diff_map = {
-        'HeightDif': 'HeightDif', 'ReachDif': 'ReachDif', 'AgeDif': 'AgeDif',
-        'LossDif': 'Losses', 'SigStrDif': 'AvgSigStrLanded', 'AvgTDDif': 'AvgTDLanded',
-        'TotalRoundDif': 'TotalRoundDif', 'TotalTitleBoutDif': 'TotalTitleBoutDif',
-        'WeightDif': 'WeightLbs', 'AvgSigStrPctDif': 'AvgSigStrPct', 'AvgTDPctDif': 'AvgTDPct',
-        'AvgSubAttDif': 'AvgSubAtt', 'WinsDif': 'Wins', 'OddsDif': 'Odds'
-    }
+def read_processed(path='processed_data.csv'):
+    with open(path, 'r') as infile:
+        for row in csv.DictReader(infile):
+            if row['Winner']: yield row
 
+def engineer_rows(rows):
+    # Yields (split key, engineered row) pairs; the key identifies the fight, not its features.
     for row in rows:
         try:
             new_row = {}
@@ -39,29 +26,39 @@ def prepare_and_engineer_data():
                     new_row[key] = to_float(row[attr])
                 else:
                     new_row[key] = to_float(row[f'Red{attr}']) - to_float(row[f'Blue{attr}'])
-            
+
             # Special case for RankDif
             new_row['RankDif'] = get_rank(row['RMatchWCRank']) - get_rank(row['BMatchWCRank'])
 
-            engineered_rows.append(new_row)
+            # Older processed files carry no identity columns, so fall back to the whole row.
+            if all(k in row for k in key_names): split_key = '|'.join(row[k] for k in key_names)
+            else: split_key = '|'.join(row.values())
+            yield split_key, new_row
 
         except (ValueError, TypeError, KeyError) as e:
             continue
 
-    # --- Splitting and Writing Data ---
-    random.shuffle(engineered_rows)
-    split_index = int(len(engineered_rows) * 0.8)
-    training_data = engineered_rows[:split_index]
-    testing_data = engineered_rows[split_index:]
-    header = list(engineered_rows[0].keys())
+def is_test_row(split_key, test_fraction=0.2, salt=''):
+    # Hashing the fight identity gives the same split on every run and on every machine, without buffering rows.
+    digest = hashlib.sha1(f'{salt}{split_key}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') < test_fraction * 2 ** 64
+
+def prepare_and_engineer_data(source='processed_data.csv', test_fraction=0.2, salt=''):
+    counts = {'training': 0, 'testing': 0}
+    writers = {}; npy_writers = {}
+    with ExitStack() as stack:
+        for name in counts:
+            writers[name] = csv.DictWriter(stack.enter_context(open(f'{name}.csv', 'w', newline='')), fieldnames=header)
+            writers[name].writeheader()
+            npy_writers[name] = stack.enter_context(NpyStreamWriter(f'{name}.npy', header))
+
+        for split_key, new_row in engineer_rows(read_processed(source)):
+            name = 'testing' if is_test_row(split_key, test_fraction, salt) else 'training'
+            writers[name].writerow(new_row)
+            npy_writers[name].write([new_row[h] for h in header])
+            counts[name] += 1
 
-    for filename, data in [('training.csv', training_data), ('testing.csv', testing_data)]:
-        with open(filename, 'w', newline='') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=header)
-            writer.writeheader()
-            writer.writerows(data)
-    
-    print(f"Successfully created final training.csv ({len(training_data)} rows) and testing.csv ({len(testing_data)} rows).")
+    print(f"Successfully created final training.csv ({counts['training']} rows) and testing.csv ({counts['testing']} rows), plus .npy copies.")
 
 if __name__ == '__main__':
-    prepare_and_engineer_data()
\ No newline at end of file
+    prepare_and_engineer_data()
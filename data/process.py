@@ -1,6 +1,8 @@
-
 import csv
 
+# Identity columns, used by prepare_training_data for a deterministic train/test split
+key_names = ['Date', 'RedFighter', 'BlueFighter']
+
 # Column names to extract
 feature_names = [
     'Winner', 'HeightDif', 'ReachDif', 'AgeDif', 'WinStreakDif', 'LossDif',
@@ -13,17 +15,21 @@ feature_names = [
     'RMatchWCRank', 'BMatchWCRank'
 ]
 
-with open('ufc-master.csv', 'r') as infile, open('processed_data.csv', 'w', newline='') as outfile:
-    reader = csv.DictReader(infile)
-    writer = csv.DictWriter(outfile, fieldnames=feature_names)
-
-    writer.writeheader()
+def extract_rows(path='ufc-master.csv'):
+    # Yields one selected row at a time so memory stays flat however many events the source holds.
+    with open(path, 'r') as infile:
+        for row in csv.DictReader(infile):
+            try:
+                yield {key: row[key] for key in key_names + feature_names}
+            except KeyError as e:
+                print(f"Skipping row due to missing key: {e}")
+                print(f"Row content: {row}")
 
-    for row in reader:
-        try:
-            selected_row = {key: row[key] for key in feature_names}
-            writer.writerow(selected_row)
-        except KeyError as e:
-            print(f"Skipping row due to missing key: {e}")
-            print(f"Row content: {row}")
+def process(source='ufc-master.csv', destination='processed_data.csv'):
+    with open(destination, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=key_names + feature_names)
+        writer.writeheader()
+        writer.writerows(extract_rows(source))
 
+if __name__ == '__main__':
+    process()
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+from fighter_index import FighterTable
+from model_artifact import stance_feature
+from features import PRECOMPUTED_DIFFS, diff_map, get_rank
+
+# Bumped whenever feature_sources changes what a fighter pair scores, so saved matchup tables are rebuilt.
+ENGINEERING_VERSION = 2
+
+# Features taken from a single corner, e.g. RedOdds / BlueOdds.
+RAW_FEATURES = ['AvgSigStrLanded', 'AvgSigStrPct', 'AvgTDLanded', 'AvgTDPct', 'AvgSubAtt', 'Wins', 'Losses', 'Odds']
+
+def sigmoid(z):
+    return 1 / (1 + math.exp(-max(-100.0, min(100.0, z))))
+
+def blank_as_zero(values):
+    return np.where(np.isnan(values), 0.0, values)
+
+def feature_sources(weights):
+    """Yields (feature, field, column, red_sign, blue_sign) for every feature a fighter pair can produce, in engineering order.
+
+    Features are engineered the way prepare_training_data builds them for training, including the Blue minus Red
+    sign of the precomputed ufc-master differences. `field` is the fighter stat the feature reads and `column` turns
+    a FighterTable into every fighter's value of it as one array; the pair's feature value is
+    red_sign * column[red] + blue_sign * column[blue]. Blank stats count as 0, like to_float.
+    """
+    numeric = lambda field: (lambda table: blank_as_zero(table.numeric(field)))
+    for feature, attr in diff_map.items():
+        if attr in PRECOMPUTED_DIFFS: yield feature, PRECOMPUTED_DIFFS[attr], numeric(PRECOMPUTED_DIFFS[attr]), -1.0, 1.0
+        else: yield feature, attr, numeric(attr), 1.0, -1.0
+    yield 'RankDif', 'MatchWCRank', (lambda table: np.array([get_rank(rank) for rank in table.strings('MatchWCRank')], dtype=np.float64)), 1.0, -1.0
+    for feat in RAW_FEATURES:
+        yield f'Red{feat}', feat, numeric(feat), 1.0, 0.0
+        yield f'Blue{feat}', feat, numeric(feat), 0.0, 1.0
+    for feature in weights:
+        one_hot = stance_feature(feature)
+        if one_hot:
+            corner, stance = one_hot
+            yield feature, 'Stance', (lambda table, stance=stance: np.array([s == stance for s in table.strings('Stance')], dtype=np.float64)), float(corner == 'Red'), float(corner == 'Blue')
+
+def model_sources(model):
+    # Only features that are both trained and scaled contribute, matching the original per-request loop.
+    weights = model.weight_map()
+    return [s for s in feature_sources(weights) if s[0] in weights and model.scaling(s[0])]
+
+def input_fields(model):
+    """The fighter stat fields `model` reads, e.g. to check that a card carries all of them."""
+    return {source[1] for source in model_sources(model)}
+
+class CompiledModel:
+    """A ModelArtifact folded against one pre-parsed numeric row per fighter.
+
+    With k = weight / std_dev, a pair scores as
+        z = bias - sum(k * mean) + fighter[red] @ (k * red_sign) + fighter[blue] @ (k * blue_sign)
+    so each fighter's two dot products are computed once here and a prediction is two lookups.
+    `fighter_stats` is a FighterTable, whose columns are parsed only when the model uses them, or any
+    {name: stats} mapping, which is converted to one first.
+    """
+    def __init__(self, model, fighter_stats):
+        fighter_stats = FighterTable.from_mapping(fighter_stats)
+        weights = model.weight_map()
+        sources = model_sources(model)
+        self.features = [s[0] for s in sources]
+        self.weights = np.array([weights[f] for f in self.features], dtype=np.float64)
+        self.means = np.array([model.scaling(f)[0] for f in self.features], dtype=np.float64)
+        self.std_devs = np.array([model.scaling(f)[1] for f in self.features], dtype=np.float64)
+        self.red_signs = np.array([s[3] for s in sources], dtype=np.float64)
+        self.blue_signs = np.array([s[4] for s in sources], dtype=np.float64)
+
+        folded = self.weights / self.std_devs
+        self.red_weights = folded * self.red_signs
+        self.blue_weights = folded * self.blue_signs
+        self.bias = float(model.bias - np.dot(folded, self.means))
+
+        self.names = list(fighter_stats)
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        self.fighters = np.column_stack([column(fighter_stats) for _, _, column, _, _ in sources]) if sources else np.empty((len(self.names), 0))
+        self.red_scores = self.fighters @ self.red_weights
+        self.blue_scores = self.fighters @ self.blue_weights
+        # Plain-float copies keep single predictions free of NumPy scalar overhead.
+        self._red_score_list = self.red_scores.tolist()
+        self._blue_score_list = self.blue_scores.tolist()
+
+    def logit(self, red_row, blue_row):
+        return self.bias + self._red_score_list[red_row] + self._blue_score_list[blue_row]
+
+    def probability(self, red_row, blue_row):
+        return sigmoid(self.logit(red_row, blue_row))
+
+    def logits(self, red_rows, blue_rows):
+        return self.bias + self.red_scores[red_rows] + self.blue_scores[blue_rows]
+
+    def probabilities(self, red_rows, blue_rows):
+        with np.errstate(over='ignore'):
+            return 1 / (1 + np.exp(-self.logits(red_rows, blue_rows)))
+
+    def feature_values(self, red_rows, blue_rows):
+        return self.fighters[red_rows] * self.red_signs + self.fighters[blue_rows] * self.blue_signs
+
+    def contributions(self, red_rows, blue_rows):
+        # Per-feature terms in the unfolded form, so explanations see exactly what the original loop produced.
+        return self.weights * ((self.feature_values(red_rows, blue_rows) - self.means) / self.std_devs)
+
+def compile_model(model, fighter_stats):
+    return CompiledModel(model, fighter_stats)
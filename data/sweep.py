@@ -0,0 +1,90 @@
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from train_model import calculate_scaling_params, fit, load_training_matrix, save_model, standardize
+
+# Set in each worker by _init_worker: memory-mapped views of the shared standardized data.
+_X = _y = _folds = None
+
+def _init_worker(data_path):
+    global _X, _y, _folds
+    data = np.load(data_path, mmap_mode='r')
+    _X, _y, _folds = data[:, :-2], data[:, -2], data[:, -1]
+
+def log_loss(y, p, eps=1e-15):
+    p = np.clip(p, eps, 1 - eps)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+def _run_fold(task):
+    config, fold = task
+    train, held_out = _folds != fold, _folds == fold
+    weights, bias, steps = fit(np.asarray(_X[train]), np.asarray(_y[train]), **config)
+    z = np.clip(_X[held_out] @ weights + bias, -100, 100)
+    p = 1 / (1 + np.exp(-z))
+    y = _y[held_out]
+    return config, fold, {'accuracy': float(((p >= 0.5) == y).mean()), 'log_loss': log_loss(y, p), 'iterations_run': steps}
+
+def build_grid(solver, learning_rates, iterations, l2s):
+    # Newton ignores the learning rate, so don't fan it out.
+    if solver == 'newton': learning_rates = learning_rates[:1]
+    return [{'solver': solver, 'learning_rate': lr, 'iterations': it, 'l2': l2} for lr, it, l2 in itertools.product(learning_rates, iterations, l2s)]
+
+def run_sweep(grid, folds=5, workers=None, seed=0, output='model.json'):
+    """k-fold cross-validates every config on a process pool and writes the best one (by mean log-loss) to `output`.
+
+    The training set is standardized once with full-data scaling params and written to a temporary .npy
+    that every worker memory-maps, so the matrix is never pickled per task.
+    """
+    features, X, y = load_training_matrix('training')
+    if X is None or len(y) == 0:
+        print("Training data is empty.")
+        return None
+    scaling_params = calculate_scaling_params(X, features)
+    X_scaled = standardize(X, features, scaling_params)
+    fold_ids = np.random.default_rng(seed).permutation(len(y)) % folds
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'sweep_data.npy')
+        np.save(data_path, np.column_stack([X_scaled, y, fold_ids]))
+        tasks = [(config, fold) for config in grid for fold in range(folds)]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(data_path,)) as pool:
+            fold_results = list(pool.map(_run_fold, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count())))))
+        elapsed = time.perf_counter() - start
+
+    table = []
+    for i, config in enumerate(grid):
+        scores = [r for c, f, r in fold_results[i * folds:(i + 1) * folds]]
+        table.append(dict(config, accuracy=float(np.mean([s['accuracy'] for s in scores])), log_loss=float(np.mean([s['log_loss'] for s in scores]))))
+    table.sort(key=lambda row: (row['log_loss'], -row['accuracy']))
+
+    print(f"{len(grid)} configs x {folds} folds in {elapsed:.1f}s")
+    print(f"{'rank':>4}  {'solver':<7}{'lr':>8}{'iters':>7}{'l2':>8}{'accuracy':>10}{'log_loss':>10}")
+    for rank, row in enumerate(table, 1):
+        print(f"{rank:>4}  {row['solver']:<7}{row['learning_rate']:>8g}{row['iterations']:>7}{row['l2']:>8g}{row['accuracy'] * 100:>9.2f}%{row['log_loss']:>10.4f}")
+
+    best = {k: table[0][k] for k in ('solver', 'learning_rate', 'iterations', 'l2')}
+    if output:
+        weights, bias, _ = fit(X_scaled, y, **best)
+        save_model(features, weights, bias, scaling_params, output)
+        print(f"Best config {best} retrained on all training data and saved to {output}")
+    return table
+
+def _floats(text): return [float(v) for v in text.split(',')]
+def _ints(text): return [int(v) for v in text.split(',')]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Parallel k-fold hyperparameter sweep for train_model.")
+    parser.add_argument('--solver', default='gd', choices=['gd', 'sgd', 'newton'])
+    parser.add_argument('--learning-rates', type=_floats, default=[0.001, 0.01, 0.1])
+    parser.add_argument('--iterations', type=_ints, default=[500, 1000, 2000])
+    parser.add_argument('--l2', type=_floats, default=[0.0, 0.001, 0.01, 0.1])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='model.json', help="Where to write the best model; empty to skip.")
+    args = parser.parse_args()
+    run_sweep(build_grid(args.solver, args.learning_rates, args.iterations, args.l2), args.folds, args.workers, output=args.output)
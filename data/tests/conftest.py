@@ -0,0 +1,78 @@
+import os
+import sys
+
+# The pipeline scripts are flat modules run from data/, so tests import them the same way.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import threading
+import pytest
+
+CORNER_DEFAULTS = {
+    'HeightCms': '180', 'ReachCms': '185', 'Age': '30', 'Stance': 'Orthodox', 'CurrentWinStreak': '1', 'Losses': '2',
+    'AvgSigStrLanded': '4.0', 'AvgTDLanded': '1.0', 'TotalRoundsFought': '10', 'TotalTitleBouts': '0', 'AvgSigStrPct': '0.5',
+    'AvgTDPct': '0.4', 'AvgSubAtt': '0.5', 'Wins': '10', 'Odds': '-150', 'WeightLbs': '155',
+}
+
+def make_fight(date, red, blue, winner='Red', weight_class='Lightweight', red_rank='', blue_rank='', **columns):
+    """One ufc-master.csv style row; `columns` overrides any cell, e.g. RedWins='12'."""
+    fight = {'Date': date, 'RedFighter': red, 'BlueFighter': blue, 'Winner': winner, 'WeightClass': weight_class,
+             'RMatchWCRank': red_rank, 'BMatchWCRank': blue_rank, 'Location': 'Las Vegas'}
+    for corner in ('Red', 'Blue'):
+        for field, value in CORNER_DEFAULTS.items(): fight[f'{corner}{field}'] = value
+    # ufc-master.csv also carries precomputed differences (some of them Blue minus Red).
+    for dif in ('HeightDif', 'ReachDif', 'AgeDif', 'WinStreakDif', 'LossDif', 'SigStrDif', 'AvgTDDif', 'TotalRoundDif', 'TotalTitleBoutDif'): fight[dif] = '0'
+    fight.update(columns)
+    return fight
+
+@pytest.fixture
+def write_fights():
+    def write(path, fights):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(fights[0]))
+            writer.writeheader()
+            writer.writerows(fights)
+        return str(path)
+    return write
+
+import json
+
+ROSTER_FIGHTS = [
+    make_fight('2024-05-01', 'Alan', 'Cole', winner='Red', blue_rank='3', RedReachCms='190', BlueReachCms='175', RedAge='28', BlueAge='34'),
+    make_fight('2024-04-01', 'Drew', 'Eddy', winner='Blue', red_rank='5', RedLosses='6', BlueLosses='1', RedStance='Southpaw'),
+    make_fight('2024-03-01', 'Finn', 'Gary', winner='Red', weight_class='Heavyweight', RedReachCms='200', BlueReachCms='198', RedWeightLbs='250', BlueWeightLbs='240'),
+    make_fight('2023-09-01', 'Cole', 'Drew', winner='Red', red_rank='C', RedAge='33', BlueAge='29', BlueReachCms='182'),
+    make_fight('2023-05-01', 'Hank', 'Ivan', winner='Red', weight_class="Women's Strawweight", RedReachCms='160', BlueReachCms='158'),
+    make_fight('2023-02-01', 'Eddy', 'Alan', winner='Blue', RedLosses='3', BlueLosses='0', RedAge='31', BlueAge='27'),
+]
+
+# Like the trained model, ReachDif and AgeDif are Blue minus Red (ufc-master's precomputed columns), the rest Red minus Blue.
+MODEL = {
+    'weights': {'ReachDif': -0.4, 'AgeDif': 0.3, 'LossDif': -0.2, 'RankDif': -0.25, 'WeightDif': 0.1, 'RedStance_Southpaw': 0.05},
+    'bias': 0.02,
+    'scaling_params': {'ReachDif': {'mean': -0.5, 'std_dev': 8.0}, 'AgeDif': {'mean': 0.2, 'std_dev': 4.0}, 'LossDif': {'mean': 0.1, 'std_dev': 3.0},
+                       'RankDif': {'mean': 0.0, 'std_dev': 7.0}, 'WeightDif': {'mean': 0.0, 'std_dev': 1}, 'RedStance_Southpaw': {'mean': 0.2, 'std_dev': 0.4}},
+}
+
+@pytest.fixture
+def serving_dir(tmp_path, monkeypatch, write_fights):
+    """A working directory holding a small ufc-master.csv and model.json, with api_server loaded from it."""
+    import api_server
+    monkeypatch.chdir(tmp_path)
+    write_fights(tmp_path / 'ufc-master.csv', ROSTER_FIGHTS)
+    (tmp_path / 'model.json').write_text(json.dumps(MODEL, indent=4))
+    monkeypatch.setattr(api_server, 'STATE', None)
+    assert api_server.load_data()
+    yield tmp_path
+    api_server.PREDICTION_CACHE.clear()
+
+@pytest.fixture
+def server(serving_dir):
+    """api_server on an ephemeral port with two work slots, serving the serving_dir data."""
+    import api_server
+    httpd = api_server.make_server(port=0, workers=2, timeout=5)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from batch_scoring import BatchScorer, CsvChunk, ScoreSummary, american_payout, parse_ranks, score_file
+from conftest import MODEL, make_fight
+from dataset import NpyStreamWriter
+from model_artifact import ModelArtifact
+
+def test_ranks_and_payouts():
+    assert parse_ranks(['C', '3', '', 'x']).tolist() == [0.0, 3.0, 20.0, 20.0]
+    assert american_payout(np.array([150.0, -200.0])).tolist() == [1.5, 0.5]
+
+def test_summary_metrics_match_their_definitions():
+    p = np.array([0.9, 0.2, 0.6, 0.4])
+    y = np.array([1.0, 0.0, 0.0, np.nan])
+    summary = ScoreSummary()
+    summary.update(p, y, red_odds=np.array([-200.0, 150.0, 120.0, 100.0]), blue_odds=np.array([170.0, -180.0, np.nan, -110.0]))
+    report = summary.report()
+    assert (report['rows'], report['labeled'], report['accuracy']) == (4, 3, pytest.approx(2 / 3))
+    assert report['log_loss'] == pytest.approx(-(np.log(0.9) + np.log(0.8) + np.log(0.4)) / 3)
+    assert report['brier'] == pytest.approx((0.01 + 0.04 + 0.36) / 3)
+    # Red at -200 wins (+0.5), Blue at -180 wins (+100/180), Red at +120 loses (-1).
+    assert report['bets'] == 3 and report['profit'] == pytest.approx(0.5 + 100 / 180 - 1)
+    assert sum(bucket['count'] for bucket in report['calibration']) == 3
+
+def assert_same_scores(report, expected):
+    for metric, value in expected.items():
+        if metric != 'calibration': assert report[metric] == pytest.approx(value); continue
+        assert [(b['range'], b['count']) for b in report[metric]] == [(b['range'], b['count']) for b in value]
+        for bucket, expected_bucket in zip(report[metric], value):
+            assert (bucket['mean_predicted'], bucket['observed_red_rate']) == pytest.approx((expected_bucket['mean_predicted'], expected_bucket['observed_red_rate']))
+
+def test_chunking_and_table_format_do_not_change_the_report(tmp_path, write_fights):
+    rng = np.random.default_rng(5)
+    fights = [make_fight(f'2024-01-{i % 28 + 1:02d}', f'R{i}', f'B{i}', winner='Red' if rng.random() < 0.5 else 'Blue',
+                         ReachDif=f'{rng.normal(0, 8):.3f}', AgeDif=f'{rng.normal(0, 4):.3f}', RedOdds='-150', BlueOdds='130') for i in range(50)]
+    source = write_fights(tmp_path / 'fights.csv', fights)
+    model = ModelArtifact.from_dict(MODEL)
+    whole = score_file(model, source)
+    assert_same_scores(score_file(model, source, chunk_rows=7), whole)
+    assert whole['rows'] == 50 and whole['bets'] == 50
+
+    # The same fights engineered into a numeric table score the same; it has no odds, so no bets.
+    scorer = BatchScorer(model)
+    header = list(fights[0])
+    chunk = CsvChunk(header, [[fight[c] for c in header] for fight in fights])
+    with NpyStreamWriter(str(tmp_path / 'engineered.npy'), ['Winner'] + scorer.features) as writer:
+        for label, row in zip(chunk.labels().tolist(), scorer.feature_matrix(chunk).tolist()): writer.write([label] + row)
+    engineered = score_file(model, str(tmp_path / 'engineered.npy'), chunk_rows=8)
+    assert_same_scores(engineered, dict(whole, bets=0, profit=0.0, roi=None))
+
+def test_raw_fights_are_engineered_like_training_rows():
+    # Pins the engineering predict_upcoming relies on: precomputed *Dif columns as they are (Blue minus Red in
+    # ufc-master), every other difference Red minus Blue from the corners, and RankDif from the match ranks.
+    from features import diff_map
+    from prepare_training_data import engineer_rows
+    features = list(diff_map) + ['RankDif', 'RedStance_Southpaw']
+    model = ModelArtifact.from_dict({'weights': {f: 1.0 for f in features}, 'bias': 0.0, 'scaling_params': {f: {'mean': 0.0, 'std_dev': 1.0} for f in features}})
+    fight = make_fight('2024-06-01', 'Alan', 'Cole', red_rank='C', blue_rank='7', RedStance='Southpaw', RedReachCms='190', BlueReachCms='178', ReachDif='-12',
+                       RedLosses='1', BlueLosses='5', LossDif='4', RedWeightLbs='170', BlueWeightLbs='155', RedOdds='-250', BlueOdds='200', RedWins='14', BlueWins='9')
+    values = dict(zip(features, BatchScorer(model).feature_matrix(CsvChunk(list(fight), [list(fight.values())]))[0].tolist()))
+    assert (values['ReachDif'], values['LossDif'], values['WeightDif'], values['OddsDif'], values['WinsDif']) == (-12.0, -4.0, 15.0, -450.0, 5.0)
+    assert (values['RankDif'], values['RedStance_Southpaw']) == (-7.0, 1.0)
+    (_, training_row), = engineer_rows([fight])
+    assert {f: values[f] for f in training_row if f != 'Winner'} == {f: v for f, v in training_row.items() if f != 'Winner'}
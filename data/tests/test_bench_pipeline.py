@@ -0,0 +1,33 @@
+import csv
+from conftest import ROSTER_FIGHTS
+from bench_pipeline import compare, parse_scales, synthesize
+
+def stage(seconds, peak_rss_mb=50.0):
+    return {'seconds': seconds, 'peak_rss_mb': peak_rss_mb}
+
+def results(**stages):
+    return {'scales': {'10x': {'stages': stages}}}
+
+def test_default_scales_stay_small_and_large_is_opt_in():
+    assert parse_scales('1,10') == [1, 10]
+    assert parse_scales('1,10', large=True) == [1, 10, 100, 1000]
+    assert parse_scales('100', large=True) == [100, 1000]
+
+def test_compare_flags_growth_past_threshold_and_noise_floor():
+    baseline = results(train=stage(2.0), evaluate=stage(0.01), load_data=stage(1.0, 60.0))
+    current = results(train=stage(2.6), evaluate=stage(0.03), load_data=stage(1.1, 95.0))
+    # evaluate tripled but by less than MIN_DELTA; load_data time grew only 10%.
+    assert compare(current, baseline, 0.2) == [('10x', 'train', 'seconds', 2.0, 2.6), ('10x', 'load_data', 'peak_rss_mb', 60.0, 95.0)]
+    assert compare(current, baseline, 0.5) == [('10x', 'load_data', 'peak_rss_mb', 60.0, 95.0)]
+
+def test_compare_reports_failed_stages_and_skips_unmeasured_ones():
+    baseline = {'scales': {'10x': {'stages': {'train': stage(1.0), 'evaluate': {'error': 'boom'}}}}}
+    current = {'scales': {'10x': {'stages': {'train': {'error': 'MemoryError'}, 'evaluate': stage(9.0)}}, '100x': {'stages': {'train': stage(9.0)}}}}
+    assert compare(current, baseline, 0.2) == [('10x', 'train', 'error', None, 'MemoryError')]
+
+def test_synthesize_repeats_every_fight_with_unique_keys(tmp_path, write_fights):
+    source = write_fights(tmp_path / 'ufc-master.csv', ROSTER_FIGHTS)
+    assert synthesize(source, str(tmp_path / 'big.csv'), 3) == 3 * len(ROSTER_FIGHTS)
+    with open(tmp_path / 'big.csv', newline='') as f: rows = list(csv.DictReader(f))
+    assert len({(r['Date'], r['RedFighter'], r['BlueFighter']) for r in rows}) == len(rows)
+    assert {r['RedFighter'] for r in rows} == {f['RedFighter'] for f in ROSTER_FIGHTS}
@@ -0,0 +1,75 @@
+import http.client
+import json
+import pytest
+import api_server
+from card_jobs import JobQueue, parse_card, scores_from_columns
+from conftest import ROSTER_FIGHTS, make_fight
+from fighter_index import CORNER_FIELDS
+
+NAMES_CARD = b'RedFighter,BlueFighter\nAlan,Cole\nDrew,Nobody\nFinn,Gary\n'
+
+@pytest.fixture
+def jobs(serving_dir, monkeypatch):
+    queue = JobQueue(workers=1, chunk_size=2)
+    monkeypatch.setattr(api_server, 'CARD_JOBS', queue)
+    yield queue
+    queue.shutdown()
+
+def finished(job):
+    while not job.wait(len(job.results), timeout=5)[1]: pass
+    return job
+
+def test_a_names_only_card_runs_to_a_written_output(jobs):
+    job = finished(jobs.submit(*parse_card(NAMES_CARD), api_server.STATE))
+    summary = job.summary()
+    assert summary['status'] == 'done' and summary['total'] == summary['completed'] == 3
+    assert [r['RedFighter'] for r in summary['results']] == ['Alan', 'Drew', 'Finn']
+    assert summary['results'][1] == {'RedFighter': 'Drew', 'BlueFighter': 'Nobody', 'error': 'One or both fighters not found.'}
+    single = api_server.predict_winner('Alan', 'Cole')
+    assert (summary['results'][0]['PredictedWinner'], summary['results'][0]['Confidence']) == (single['PredictedWinner'], single['Confidence'])
+    with open(summary['output']) as f: assert json.load(f) == summary['results']
+    assert job.summary(2)['results'] == summary['results'][2:]
+
+def test_stat_column_and_names_only_cards_agree(jobs):
+    # A card carrying each fighter's latest stats must score exactly like the same card by name.
+    state = api_server.STATE
+    stats = state.fighter_stats
+    pairs = [('Alan', 'Cole'), ('Finn', 'Gary'), ('Eddy', 'Drew')]
+    fights = [make_fight('2024-06-01', red, blue, red_rank=stats[red]['MatchWCRank'], blue_rank=stats[blue]['MatchWCRank'],
+                         **{f'{corner}{field}': '' if stats[name][field] is None else str(stats[name][field]) for corner, name in (('Red', red), ('Blue', blue)) for field in CORNER_FIELDS})
+              for red, blue in pairs]
+    header = list(fights[0])
+    rows = [[fight[column] for column in header] for fight in fights]
+    assert scores_from_columns(header, state.model)
+    from_columns = finished(jobs.submit(header, rows, state)).results
+    by_name = finished(jobs.submit(['RedFighter', 'BlueFighter'], [list(pair) for pair in pairs], state)).results
+    assert from_columns == by_name
+    assert [r['PredictedWinner'] for r in from_columns] == [api_server.predict_winner(red, blue)['PredictedWinner'] for red, blue in pairs]
+
+def test_partial_stat_columns_are_refused(jobs, server):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.request('POST', '/jobs', b'RedFighter,BlueFighter,RedReachCms,BlueReachCms\nAlan,Cole,190,175\n', {'Content-Type': 'text/csv'})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    assert response.status == 400 and 'RedAge' in body['error'] and 'BMatchWCRank' in body['error']
+    conn.request('POST', '/jobs', NAMES_CARD, {'Content-Type': 'text/csv'})
+    response = conn.getresponse()
+    accepted = json.loads(response.read())
+    assert response.status == 202 and accepted['total'] == 3
+    finished(jobs.get(accepted['job_id']))
+    conn.request('GET', accepted['status_url'])
+    assert json.loads(conn.getresponse().read())['status'] == 'done'
+    conn.close()
+
+def test_streams_do_not_hold_work_slots(jobs, server):
+    job = finished(jobs.submit(*parse_card(NAMES_CARD), api_server.STATE))
+    for _ in range(server.workers): server.work_slots.acquire()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        conn.request('GET', f'/jobs/{job.id}/stream')
+        lines = [json.loads(line) for line in conn.getresponse().read().splitlines()]
+        conn.close()
+    finally:
+        for _ in range(server.workers): server.work_slots.release()
+    assert lines[:-1] == job.results
+    assert lines[-1]['status'] == 'done' and lines[-1]['completed'] == 3
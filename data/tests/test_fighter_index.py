@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import pytest
+from conftest import make_fight
+from fighter_index import FighterRecord, append_fights, build_index, ensure_index, read_fighter_index, stats_as_of, update_index
+
+FIGHTS = [
+    # Newest first, like ufc-master.csv.
+    make_fight('2024-03-01', 'Alan', 'Cole', winner='Red', blue_rank='3', RedWins='12'),
+    make_fight('2023-06-01', 'Alan', 'Drew', winner='Red', blue_rank=''),
+    make_fight('2023-01-01', 'Cole', 'Alan', winner='Blue', red_rank='C', BlueWins='10'),
+    make_fight('2022-01-01', 'Drew', 'Alan', winner='Red', red_rank='20'),
+]
+
+def test_ranked_wins_count_only_wins_over_ranked_opponents(tmp_path, write_fights):
+    source = write_fights(tmp_path / 'ufc-master.csv', FIGHTS)
+    build_index(source, str(tmp_path / 'index.sqlite'))
+    fighters = read_fighter_index(str(tmp_path / 'index.sqlite'))
+    # Alan beat Cole as champion (C) and at #3; the win over unranked Drew does not count.
+    assert fighters['Alan']['RankedWins'] == 2
+    assert fighters['Drew']['RankedWins'] == 0
+
+def test_fighters_carry_their_latest_stats_most_recent_first(tmp_path, write_fights):
+    source = write_fights(tmp_path / 'ufc-master.csv', FIGHTS)
+    build_index(source, str(tmp_path / 'index.sqlite'))
+    fighters = read_fighter_index(str(tmp_path / 'index.sqlite'))
+    assert list(fighters)[:2] == ['Alan', 'Cole']
+    assert fighters['Alan']['Wins'] == 12.0
+    assert fighters['Drew']['WeightClass'] == 'Lightweight'
+
+def test_ensure_index_only_rebuilds_when_the_source_changes(tmp_path, write_fights):
+    source = write_fights(tmp_path / 'ufc-master.csv', FIGHTS)
+    path = str(tmp_path / 'index.sqlite')
+    meta = ensure_index(source, path)
+    built = os.stat(path).st_mtime_ns
+    assert ensure_index(source, path) == meta
+    assert os.stat(path).st_mtime_ns == built
+    write_fights(source, [make_fight('2024-06-01', 'Cole', 'Drew')] + FIGHTS)
+    assert ensure_index(source, path)['source_sha256'] != meta['source_sha256']
+    assert 'Cole' == next(iter(read_fighter_index(path)))
+
+NEWER = [
+    make_fight('2024-07-01', 'Drew', 'Cole', winner='Red', blue_rank='2', RedWins='9'),
+    make_fight('2024-07-01', 'Eddy', 'Alan', winner='Blue', red_rank='7'),
+]
+
+def snapshot(path):
+    conn = sqlite3.connect(path)
+    try: return [sorted(conn.execute(f'SELECT * FROM {table}')) for table in ('fights', 'snapshots', 'fighters')]
+    finally: conn.close()
+
+def grown_index(tmp_path, write_fights, before, after):
+    """Indexes `before`, rewrites the source as `after`, and returns (update_index result, updated path, rebuilt path)."""
+    source = write_fights(tmp_path / 'ufc-master.csv', before)
+    path, rebuilt = str(tmp_path / 'index.sqlite'), str(tmp_path / 'rebuilt.sqlite')
+    build_index(source, path)
+    write_fights(source, after)
+    meta = update_index(source, path)
+    build_index(source, rebuilt)
+    return meta, path, rebuilt
+
+def test_new_fights_at_the_top_update_to_the_same_index_as_a_rebuild(tmp_path, write_fights):
+    meta, path, rebuilt = grown_index(tmp_path, write_fights, FIGHTS, NEWER + FIGHTS)
+    assert meta is not None and meta['max_date'] == '2024-07-01'
+    assert snapshot(path) == snapshot(rebuilt)
+    assert [dict(record) for record in read_fighter_index(path).values()] == [dict(record) for record in read_fighter_index(rebuilt).values()]
+
+def test_new_fights_appended_to_an_oldest_first_source_update_incrementally(tmp_path, write_fights):
+    meta, path, rebuilt = grown_index(tmp_path, write_fights, FIGHTS[::-1], FIGHTS[::-1] + NEWER[::-1])
+    assert meta is not None
+    assert snapshot(path) == snapshot(rebuilt)
+
+def test_older_or_edited_fights_fall_back_to_a_rebuild(tmp_path, write_fights):
+    older = [make_fight('2021-01-01', 'Alan', 'Eddy')]
+    assert grown_index(tmp_path, write_fights, FIGHTS, older + FIGHTS)[0] is None
+    assert grown_index(tmp_path, write_fights, FIGHTS, FIGHTS + older)[0] is None
+    edited = [dict(FIGHTS[0], RedWins='13')] + FIGHTS[1:]
+    assert grown_index(tmp_path, write_fights, FIGHTS, edited)[0] is None
+    # A same-day fight listed below the indexed rows would have been applied first by a rebuild.
+    assert grown_index(tmp_path, write_fights, FIGHTS[::-1], FIGHTS[::-1] + [make_fight('2024-03-01', 'Eddy', 'Drew')])[0] is None
+    source = str(tmp_path / 'ufc-master.csv')
+    ensure_index(source, str(tmp_path / 'index.sqlite'))
+    assert snapshot(str(tmp_path / 'index.sqlite')) == snapshot(str(tmp_path / 'rebuilt.sqlite'))
+
+def test_appended_fights_move_the_source_checksum_and_data_version(tmp_path, write_fights):
+    from matchups import data_version
+    from model_artifact import ModelArtifact
+    from conftest import MODEL
+    source = write_fights(tmp_path / 'ufc-master.csv', FIGHTS)
+    path = str(tmp_path / 'index.sqlite')
+    meta = ensure_index(source, path)
+    assert append_fights([make_fight('2024-05-01', 'Drew', 'Cole', winner='Blue', BlueWins='11')], path) == 1
+    appended = ensure_index(source, path)
+    assert appended['max_date'] == '2024-05-01' and read_fighter_index(path)['Cole']['Wins'] == 11.0
+    assert appended['source_sha256'] != meta['source_sha256']
+    model = ModelArtifact.from_dict(MODEL)
+    assert data_version(model, appended) != data_version(model, meta)
+    assert append_fights([], path) == 0 and ensure_index(source, path) == appended
+    with pytest.raises(ValueError): append_fights([make_fight('2020-01-01', 'Drew', 'Cole')], path)
+    assert ensure_index(source, path) == appended
+
+def test_stats_as_of_matches_the_as_of_table(tmp_path, write_fights):
+    source = write_fights(tmp_path / 'ufc-master.csv', FIGHTS)
+    path = str(tmp_path / 'index.sqlite')
+    build_index(source, path)
+    record = stats_as_of('Alan', '2024-03-01', path)
+    assert isinstance(record, FighterRecord)
+    assert dict(record) == dict(read_fighter_index(path, as_of='2024-03-01')['Alan'])
+    assert record['Wins'] == 12.0 and record['RankedWins'] == 1
+    assert stats_as_of('Alan', '2021-01-01', path) is None
@@ -0,0 +1,52 @@
+import pytest
+from fighter_search import FighterSearchIndex, normalize
+
+ROSTER = {
+    'Colby Covington': {'WeightClass': 'Welterweight'},
+    'Conor McGregor': {'WeightClass': 'Lightweight'},
+    'Cory Sandhagen': {'WeightClass': 'Bantamweight'},
+    'José Aldo': {'WeightClass': 'Bantamweight'},
+    'Khabib Nurmagomedov': {'WeightClass': 'Lightweight'},
+    'Islam Makhachev': {'WeightClass': 'Lightweight'},
+}
+
+@pytest.fixture
+def index(): return FighterSearchIndex(ROSTER)
+
+def names(result): return [r['name'] for r in result['results']]
+
+def test_normalize_folds_accents_case_and_punctuation():
+    assert normalize('  José   ALDO!') == 'jose aldo'
+
+def test_full_name_prefixes_rank_ahead_of_later_word_prefixes(index):
+    assert names(index.search('co')) == ['Colby Covington', 'Conor McGregor', 'Cory Sandhagen']
+    assert names(index.search('cov')) == ['Colby Covington']
+    assert names(index.search('mak')) == ['Islam Makhachev']
+
+def test_typos_fall_back_to_trigram_matches(index):
+    assert names(index.search('covingtun')) == ['Colby Covington']
+    assert index.search('covingtun', fuzzy=False)['total'] == 0
+
+def test_fuzzy_scan_is_skipped_when_a_query_has_enough_prefix_matches(monkeypatch):
+    index = FighterSearchIndex(ROSTER, fuzzy_below=3)
+    monkeypatch.setattr(index, '_fuzzy_matches', lambda *args: pytest.fail("fuzzy scan ran"))
+    assert names(index.search('co', limit=2)) == ['Colby Covington', 'Conor McGregor']
+
+def test_fuzzy_matches_follow_the_prefix_matches(index):
+    result = index.search('jose aldp', limit=5)
+    assert names(result) == ['José Aldo'] and result['total'] == 1
+
+def test_paging_sees_one_total_and_one_order():
+    roster = {f'Jon {surname}': {'WeightClass': 'Lightweight'} for surname in ('Adams', 'Baker', 'Clark', 'Dunn', 'Evans')}
+    roster.update({'Jose Onda': {'WeightClass': 'Lightweight'}, 'Joon Park': {'WeightClass': 'Lightweight'}})
+    index = FighterSearchIndex(roster, fuzzy_threshold=0.2, fuzzy_below=6)
+    everything = index.search('jon', limit=100)
+    assert names(everything)[:5] == [f'Jon {s}' for s in ('Adams', 'Baker', 'Clark', 'Dunn', 'Evans')] and everything['total'] > 5
+    pages = [index.search('jon', limit=2, offset=offset) for offset in range(0, everything['total'], 2)]
+    assert {page['total'] for page in pages} == {everything['total']}
+    assert [name for page in pages for name in names(page)] == names(everything)
+
+def test_weight_class_filter_and_paging(index):
+    result = index.search('', weight_class='Lightweight', limit=2, offset=1)
+    assert result['total'] == 3
+    assert names(result) == ['Islam Makhachev', 'Khabib Nurmagomedov']
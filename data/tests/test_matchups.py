@@ -0,0 +1,49 @@
+import json
+import numpy as np
+from matchups import compute_table, load_table, save_table
+
+def test_table_probabilities_match_batch_scoring(serving_dir):
+    import api_server
+    state = api_server.STATE
+    compiled = state.compiled
+    pairs = [('Alan', 'Cole'), ('Drew', 'Eddy'), ('Finn', 'Gary'), ('Hank', 'Ivan')]
+    for red, blue in pairs:
+        expected = compiled.probabilities(np.array([compiled.rows[red]]), np.array([compiled.rows[blue]]))[0]
+        assert state.matchups.probability(red, blue) == expected
+    batch = api_server.predict_batch(pairs, explain=False)['results']
+    single = [api_server.predict_winner(red, blue) for red, blue in pairs]
+    assert [r['Confidence'] for r in batch] == [r['Confidence'] for r in single]
+
+def test_beats_reads_the_same_rates_as_the_full_matrix(serving_dir):
+    import api_server
+    table = api_server.STATE.matchups
+    for fighter in ('Alan', 'Cole', 'Drew', 'Eddy'):
+        wc, i = table.positions[fighter]
+        names = table.classes[wc][1]
+        against = 1 - table._win_rates(wc)[i]
+        expected = sorted(((names[j], float(against[j])) for j in range(len(names)) if j != i and against[j] > 0.2), key=lambda item: -item[1])
+        assert [(r['name'], r['probability']) for r in table.beats(fighter, 0.2)] == expected
+    assert table.beats('Nobody') is None
+
+def test_rank_orders_a_division_by_expected_win_rate(serving_dir):
+    import api_server
+    ranking = api_server.STATE.matchups.rank('Lightweight')
+    assert sorted(r['name'] for r in ranking) == ['Alan', 'Cole', 'Drew', 'Eddy']
+    rates = [r['expected_win_rate'] for r in ranking]
+    assert rates == sorted(rates, reverse=True)
+    assert api_server.STATE.matchups.rank("Women's Strawweight")[0]['name'] == 'Hank'
+
+def test_saved_table_loads_only_for_its_version_and_well_formed(serving_dir):
+    import api_server
+    state = api_server.STATE
+    table = compute_table(state.compiled, state.fighter_stats, state.version)
+    save_table(table)
+    loaded = load_table(state.version)
+    assert loaded.classes == table.classes and np.array_equal(loaded.data, table.data)
+    assert load_table('another-version') is None
+    manifest = json.loads(open('matchups.json').read())
+    del manifest['classes']
+    with open('matchups.json', 'w') as f: json.dump(manifest, f)
+    assert load_table(state.version) is None
+    with open('matchups.json', 'w') as f: f.write('[]')
+    assert load_table(state.version) is None
@@ -0,0 +1,71 @@
+import http.client
+import json
+import socket
+import time
+import pytest
+import api_server
+from metrics import METRICS, Histogram, Metrics
+
+def counter(name): return METRICS.snapshot()['counters'].get(name, 0)
+
+def counted(name, expected, timeout=2.0):
+    # Request metrics are recorded once the handler returns, just after the client has its response.
+    deadline = time.monotonic() + timeout
+    while counter(name) < expected and time.monotonic() < deadline: time.sleep(0.01)
+    return counter(name) == expected
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram([0.1, 1.0, float('inf')])
+    for value in (0.05, 0.5, 0.7, 5.0): histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {'0.1': 1, '1': 3, '+Inf': 4}
+    assert snapshot['count'] == 4 and snapshot['mean'] == pytest.approx(6.25 / 4)
+
+def test_timer_records_even_when_the_block_raises():
+    metrics = Metrics()
+    with pytest.raises(RuntimeError):
+        with metrics.timer('stage:x'): raise RuntimeError
+    assert metrics.snapshot()['histograms']['stage:x']['count'] == 1
+
+def post(server, body, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.request('POST', '/predict', body, headers or {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read())
+    conn.close()
+    return result
+
+def test_a_handler_that_raises_is_answered_and_counted_as_a_500(server, monkeypatch):
+    def fail(*args, **kwargs): raise RuntimeError("boom")
+    monkeypatch.setattr(api_server, 'predict_winner', fail)
+    requests, errors = counter('requests:POST /predict'), counter('responses:500')
+    status, body = post(server, b'{"red_fighter": "Alan", "blue_fighter": "Cole"}')
+    assert status == 500 and 'error' in body
+    assert counted('requests:POST /predict', requests + 1)
+    assert counter('responses:500') == errors + 1
+
+@pytest.mark.parametrize('body', [b'{not json', b'["Alan", "Cole"]', b'"Alan"'])
+def test_a_malformed_predict_body_is_a_400(server, body):
+    errors = counter('responses:500')
+    status, result = post(server, body)
+    assert status == 400 and result['error'].startswith('Malformed prediction request')
+    assert counter('responses:500') == errors
+
+def test_a_bad_content_length_is_a_400(server):
+    for length in (b'abc', b'-5'):
+        with socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=5) as sock:
+            sock.sendall(b'POST /predict HTTP/1.1\r\nHost: x\r\nContent-Length: ' + length + b'\r\n\r\n')
+            assert sock.recv(64).startswith(b'HTTP/1.1 400')
+
+def test_a_predict_without_content_length_is_counted(server):
+    requests = counter('requests:POST /predict')
+    with socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=5) as sock:
+        sock.sendall(b'POST /predict HTTP/1.1\r\nHost: x\r\n\r\n')
+        assert sock.recv(64).startswith(b'HTTP/1.1 400')
+    assert counted('requests:POST /predict', requests + 1)
+
+def test_prediction_stages_are_timed(serving_dir):
+    api_server.PREDICTION_CACHE.clear()
+    api_server.predict_winner('Alan', 'Finn')
+    histograms = METRICS.snapshot()['histograms']
+    assert {'stage:lookup', 'stage:scoring', 'stage:contributions', 'stage:explanation', 'stage:serialization'} <= set(histograms)
@@ -0,0 +1,55 @@
+import json
+import os
+import pytest
+import model_artifact
+from conftest import MODEL
+from model_artifact import ModelArtifact, ModelArtifactError, export_json, import_json, load_artifact, load_model
+
+@pytest.fixture
+def model_files(tmp_path):
+    json_path, bin_path = str(tmp_path / 'model.json'), str(tmp_path / 'model.bin')
+    with open(json_path, 'w') as f: json.dump(MODEL, f, indent=4)
+    return json_path, bin_path
+
+def test_import_then_export_reproduces_model_json_byte_for_byte(model_files, tmp_path):
+    json_path, bin_path = model_files
+    import_json(json_path, bin_path)
+    export_json(bin_path, str(tmp_path / 'exported.json'))
+    assert (tmp_path / 'exported.json').read_bytes() == open(json_path, 'rb').read()
+
+def test_checksum_identifies_the_model(model_files):
+    json_path, bin_path = model_files
+    artifact = import_json(json_path, bin_path)
+    assert load_artifact(bin_path).checksum == artifact.checksum == ModelArtifact.from_dict(MODEL).checksum
+    changed = dict(MODEL, bias=MODEL['bias'] + 1e-9)
+    assert ModelArtifact.from_dict(changed).checksum != artifact.checksum
+
+def test_corrupt_or_truncated_artifacts_are_rejected(model_files):
+    json_path, bin_path = model_files
+    import_json(json_path, bin_path)
+    data = open(bin_path, 'rb').read()
+    with open(bin_path, 'wb') as f: f.write(data[:-1] + bytes([data[-1] ^ 1]))
+    with pytest.raises(ModelArtifactError, match='checksum'): load_artifact(bin_path)
+    load_artifact(bin_path, verify=False)
+    with open(bin_path, 'wb') as f: f.write(data[:-8])
+    with pytest.raises(ModelArtifactError, match='truncated'): load_artifact(bin_path)
+    with open(bin_path, 'wb') as f: f.write(b'NOTMODEL' + data[8:])
+    with pytest.raises(ModelArtifactError, match='not a model artifact'): load_artifact(bin_path)
+
+def test_large_payloads_are_memory_mapped(model_files, monkeypatch):
+    json_path, bin_path = model_files
+    artifact = import_json(json_path, bin_path)
+    monkeypatch.setattr(model_artifact, 'MMAP_BYTES', 8)
+    loaded = load_artifact(bin_path)
+    assert loaded.to_dict() == artifact.to_dict() and loaded.folded_bias == artifact.folded_bias
+
+def test_load_model_prefers_whichever_file_is_newer(model_files):
+    json_path, bin_path = model_files
+    with pytest.raises(FileNotFoundError): load_model(json_path + '.missing', bin_path)
+    import_json(json_path, bin_path)
+    os.utime(json_path, (1, 1))
+    assert load_model(json_path, bin_path).checksum == ModelArtifact.from_dict(MODEL).checksum
+    edited = dict(MODEL, bias=0.5)
+    with open(json_path, 'w') as f: json.dump(edited, f)
+    os.utime(bin_path, (0, 0))
+    assert load_model(json_path, bin_path).bias == 0.5
@@ -0,0 +1,42 @@
+import csv
+import numpy as np
+from conftest import make_fight
+from dataset import load_csv_table, load_npy_table
+from prepare_training_data import engineer_rows, is_test_row, prepare_and_engineer_data
+from process import process
+
+def test_hash_split_is_deterministic_and_near_the_requested_fraction():
+    keys = [f'2024-01-{i % 28 + 1:02d}|Red {i}|Blue {i}' for i in range(20000)]
+    split = [is_test_row(key) for key in keys]
+    assert split == [is_test_row(key) for key in keys]
+    assert abs(sum(split) / len(keys) - 0.2) < 0.01
+    assert [is_test_row(key, test_fraction=0.5) for key in keys].count(True) > sum(split)
+
+def test_salt_reshuffles_the_split():
+    keys = [f'key {i}' for i in range(2000)]
+    assert [is_test_row(k) for k in keys] != [is_test_row(k, salt='fold-2') for k in keys]
+
+def test_split_key_follows_the_fight_not_its_features():
+    fight = make_fight('2024-01-01', 'Alan', 'Cole')
+    edited = dict(fight, RedAge='40', RMatchWCRank='C')
+    (key, _), = engineer_rows([fight])
+    (edited_key, edited_row), = engineer_rows([edited])
+    assert key == edited_key == '2024-01-01|Alan|Cole'
+    assert edited_row['RankDif'] == -20
+
+def test_pipeline_splits_every_fight_into_matching_csv_and_npy_tables(tmp_path, monkeypatch, write_fights):
+    monkeypatch.chdir(tmp_path)
+    fights = [make_fight(f'2024-{m:02d}-{d:02d}', f'Red {m}-{d}', f'Blue {m}-{d}', winner='Red' if d % 2 else 'Blue', RedAge=str(20 + d))
+              for m in range(1, 13) for d in range(1, 21)]
+    write_fights(tmp_path / 'ufc-master.csv', fights)
+    process()
+    with open('processed_data.csv') as f: assert next(csv.reader(f))[:3] == ['Date', 'RedFighter', 'BlueFighter']
+    prepare_and_engineer_data()
+    tables = {}
+    for name in ('training', 'testing'):
+        columns, data = load_csv_table(f'{name}.csv')
+        npy_columns, npy_data = load_npy_table(f'{name}.npy')
+        assert columns == npy_columns and np.array_equal(data, npy_data)
+        tables[name] = data
+    assert len(tables['training']) + len(tables['testing']) == len(fights)
+    assert 0 < len(tables['testing']) < len(tables['training'])
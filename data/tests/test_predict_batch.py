@@ -0,0 +1,35 @@
+import http.client
+import itertools
+import json
+import api_server
+from api_server import predict_batch, predict_winner, round_robin_pairs
+
+def test_batch_results_match_single_predictions_in_request_order(serving_dir):
+    pairs = [('Alan', 'Cole'), ('Nobody', 'Cole'), ('Cole', 'Alan'), ('Finn', 'Gary')]
+    results = predict_batch(pairs)['results']
+    assert [(r['RedFighter'], r['BlueFighter']) for r in results] == pairs
+    assert results[1] == {'RedFighter': 'Nobody', 'BlueFighter': 'Cole', 'error': 'One or both fighters not found.'}
+    for (red, blue), result in zip(pairs, results):
+        if 'error' in result: continue
+        single = predict_winner(red, blue)
+        assert (result['PredictedWinner'], result['Confidence'], result['explanation']) == (single['PredictedWinner'], single['Confidence'], single['explanation'])
+    assert 'explanation' not in predict_batch(pairs, explain=False)['results'][0]
+
+def test_weight_class_round_robin_and_limits(serving_dir, monkeypatch):
+    assert round_robin_pairs('Lightweight') == list(itertools.combinations(['Alan', 'Cole', 'Drew', 'Eddy'], 2))
+    assert round_robin_pairs('Flyweight') == []
+    monkeypatch.setattr(api_server, 'MAX_BATCH_PAIRS', 2)
+    assert 'exceeds the limit' in predict_batch([('Alan', 'Cole')] * 3)['error']
+
+def test_batch_endpoint(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.request('POST', '/predict_batch', json.dumps({'pairs': [{'red_fighter': 'Alan', 'blue_fighter': 'Cole'}, [' Drew ', 'Eddy']], 'explain': False}))
+    response = conn.getresponse()
+    results = json.loads(response.read())['results']
+    assert response.status == 200 and [r['RedFighter'] for r in results] == ['Alan', 'Drew']
+    conn.request('POST', '/predict_batch', json.dumps({'weight_class': "Women's Strawweight"}))
+    assert [r['PredictedWinner'] for r in json.loads(conn.getresponse().read())['results']] == [predict_winner('Hank', 'Ivan')['PredictedWinner']]
+    conn.request('POST', '/predict_batch', b'{"pairs": [1]}')
+    response = conn.getresponse()
+    assert response.status == 400 and 'Malformed' in json.loads(response.read())['error']
+    conn.close()
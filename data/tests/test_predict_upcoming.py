@@ -0,0 +1,26 @@
+import json
+from conftest import MODEL, make_fight
+from predict_upcoming import predict_upcoming
+
+CARD = [
+    # ReachDif is Blue minus Red, as in ufc-master.csv: Alan outreaches Cole, Eddy outreaches Drew.
+    make_fight('2024-08-01', 'Alan', 'Cole', winner='', RedReachCms='200', BlueReachCms='180', ReachDif='-20'),
+    make_fight('2024-08-01', 'Drew', 'Eddy', winner='', RedReachCms='180', BlueReachCms='200', ReachDif='20'),
+]
+
+def test_predictions_follow_the_card(tmp_path, monkeypatch, write_fights, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'model.json').write_text(json.dumps(MODEL))
+    write_fights(tmp_path / 'upcoming.csv', CARD)
+    predict_upcoming()
+    predictions = json.loads((tmp_path / 'predictions.json').read_text())
+    assert [(p['RedFighter'], p['BlueFighter'], p['PredictedWinner']) for p in predictions] == [('Alan', 'Cole', 'Alan'), ('Drew', 'Eddy', 'Eddy')]
+    assert 'saved to predictions.json' in capsys.readouterr().out
+
+def test_a_card_without_fighter_columns_is_reported(tmp_path, monkeypatch, write_fights, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'model.json').write_text(json.dumps(MODEL))
+    write_fights(tmp_path / 'upcoming.csv', [{k: v for k, v in fight.items() if k != 'BlueFighter'} for fight in CARD])
+    predict_upcoming()
+    assert capsys.readouterr().out.strip() == 'Error: upcoming.csv has no BlueFighter column.'
+    assert not (tmp_path / 'predictions.json').exists()
@@ -0,0 +1,48 @@
+import json
+import api_server
+from conftest import MODEL
+from prediction_cache import PredictionCache
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PredictionCache(maxsize=2)
+    cache.put('a', 1); cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('prediction_cache.time.monotonic', lambda: now[0])
+    cache = PredictionCache(ttl=5)
+    cache.put('a', 1)
+    now[0] += 6
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+def reload_without_stance(serving_dir):
+    model = dict(MODEL, weights={k: v for k, v in MODEL['weights'].items() if 'Stance' not in k})
+    (serving_dir / 'model.json').write_text(json.dumps(model))
+    assert api_server.load_data()
+
+def test_swapped_corners_are_cached_and_scored_separately(serving_dir):
+    # Different divisions, so neither call can come from the matchup table.
+    before = api_server.PREDICTION_CACHE.stats()
+    first = api_server.predict_winner('Finn', 'Alan')
+    second = api_server.predict_winner('Alan', 'Finn')
+    after = api_server.PREDICTION_CACHE.stats()
+    assert (after['misses'] - before['misses'], after['size']) == (2, before['size'] + 2)
+    assert 'Alan holds a record' in second['explanation']['details'][0]
+    assert api_server.predict_winner('Alan', 'Finn') is second
+    api_server.PREDICTION_CACHE.clear()
+    assert api_server.predict_winner('Alan', 'Finn') == second
+    assert api_server.predict_winner('Finn', 'Alan') == first
+
+def test_cache_entries_are_keyed_by_model_version(serving_dir):
+    api_server.predict_winner('Alan', 'Cole')
+    old_version = api_server.STATE.version
+    reload_without_stance(serving_dir)
+    assert api_server.STATE.version != old_version
+    assert api_server.PREDICTION_CACHE.stats()['size'] == 0
+    api_server.predict_winner('Alan', 'Cole')
+    assert api_server.PREDICTION_CACHE.get(('Alan', 'Cole', old_version)) is None
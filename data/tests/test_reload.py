@@ -0,0 +1,56 @@
+import json
+import os
+import time
+import api_server
+from conftest import MODEL
+
+def write_model(path, model):
+    path.write_text(json.dumps(model, indent=4))
+    # Make sure the stamp moves even on filesystems with coarse mtimes.
+    os.utime(path, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+
+def test_reload_swaps_in_a_new_version_and_clears_the_cache(serving_dir):
+    before = api_server.STATE
+    api_server.predict_winner('Alan', 'Cole')
+    assert api_server.PREDICTION_CACHE.stats()['size'] > 0
+    write_model(serving_dir / 'model.json', dict(MODEL, bias=1.5))
+    assert api_server.load_data()
+    assert api_server.STATE is not before and api_server.STATE.version != before.version
+    assert api_server.STATE.model.bias == 1.5
+    assert api_server.PREDICTION_CACHE.stats()['size'] == 0
+    # Requests that already read the old snapshot keep a consistent view of it.
+    assert before.model.bias == MODEL['bias']
+
+def test_a_broken_model_keeps_the_current_state(serving_dir):
+    before = api_server.STATE
+    (serving_dir / 'model.json').write_text('{"weights": ')
+    assert not api_server.load_data()
+    assert api_server.STATE is before
+
+def test_the_watcher_reloads_once_a_change_holds_still(serving_dir):
+    before = api_server.STATE
+    watcher = api_server.FileWatcher(interval=0.05)
+    watcher.start()
+    try:
+        write_model(serving_dir / 'model.json', dict(MODEL, bias=-0.5))
+        deadline = time.monotonic() + 5
+        while api_server.STATE is before and time.monotonic() < deadline: time.sleep(0.02)
+    finally:
+        watcher.stop(); watcher.join(5)
+    assert api_server.STATE.model.bias == -0.5
+
+def test_the_watcher_survives_a_malformed_model_and_picks_up_the_next_one(serving_dir):
+    before = api_server.STATE
+    watcher = api_server.FileWatcher(interval=0.05)
+    watcher.start()
+    try:
+        (serving_dir / 'model.json').write_text('[]')
+        os.utime(serving_dir / 'model.json', ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+        time.sleep(0.3)
+        assert watcher.is_alive() and api_server.STATE is before
+        write_model(serving_dir / 'model.json', dict(MODEL, bias=0.75))
+        deadline = time.monotonic() + 5
+        while api_server.STATE is before and time.monotonic() < deadline: time.sleep(0.02)
+    finally:
+        watcher.stop(); watcher.join(5)
+    assert api_server.STATE.model.bias == 0.75
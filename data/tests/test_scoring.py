@@ -0,0 +1,57 @@
+import numpy as np
+from conftest import MODEL
+from fighter_index import FighterTable, read_fighter_index
+from model_artifact import ModelArtifact
+from scoring import compile_model, sigmoid
+
+def plain_stats(table):
+    # The {name: {field: text}} dicts callers passed before the index returned tables.
+    return {name: {field: ('' if value is None else str(value)) for field, value in record.items()} for name, record in table.items()}
+
+def test_a_plain_mapping_compiles_like_the_table(serving_dir):
+    table = read_fighter_index()
+    model = ModelArtifact.from_dict(MODEL)
+    from_table, from_dict = compile_model(model, table), compile_model(model, plain_stats(table))
+    assert from_dict.names == from_table.names
+    assert np.array_equal(from_dict.fighters, from_table.fighters)
+    assert from_dict.logit(0, 1) == from_table.logit(0, 1)
+
+def test_from_mapping_keeps_tables_and_reads_numbers_or_text():
+    table = FighterTable.from_mapping({'Alan': {'WeightClass': 'Lightweight', 'ReachCms': 190.0, 'Age': '', 'Wins': 0.0, 'RankedWins': 2},
+                                       'Cole': {'WeightClass': 'Lightweight', 'ReachCms': '175', 'Stance': 'Southpaw'}})
+    assert FighterTable.from_mapping(table) is table
+    assert dict(table['Alan'])['ReachCms'] == 190.0 and table['Alan']['Age'] is None and table['Alan']['Wins'] == 0.0
+    assert table['Cole']['Stance'] == 'Southpaw' and table['Cole']['RankedWins'] == 0 and table['Cole']['MatchWCRank'] == ''
+
+def test_compiled_logit_matches_the_per_feature_formula():
+    stats = {'Red': {'ReachCms': '190', 'Age': '28', 'Losses': '1', 'MatchWCRank': '3', 'WeightLbs': '155', 'Stance': 'Southpaw'},
+             'Blue': {'ReachCms': '180', 'Age': '33', 'Losses': '4', 'MatchWCRank': '', 'WeightLbs': '155', 'Stance': 'Orthodox'}}
+    compiled = compile_model(ModelArtifact.from_dict(MODEL), stats)
+    values = {'ReachDif': -10.0, 'AgeDif': 5.0, 'LossDif': -3.0, 'RankDif': 3.0 - 20.0, 'WeightDif': 0.0, 'RedStance_Southpaw': 1.0}
+    scaling = MODEL['scaling_params']
+    z = MODEL['bias'] + sum(w * (values[f] - scaling[f]['mean']) / scaling[f]['std_dev'] for f, w in MODEL['weights'].items())
+    assert abs(compiled.logit(compiled.rows['Red'], compiled.rows['Blue']) - z) < 1e-12
+    assert abs(compiled.probability(0, 1) - sigmoid(z)) < 1e-12
+
+def test_contributions_add_up_to_the_logit_and_corners_swap_cleanly(serving_dir):
+    import api_server
+    compiled = api_server.STATE.compiled
+    red, blue = compiled.rows['Alan'], compiled.rows['Cole']
+    assert abs(MODEL['bias'] + compiled.contributions(red, blue).sum() - compiled.logit(red, blue)) < 1e-12
+    symmetric = dict(MODEL, weights={f: w for f, w in MODEL['weights'].items() if 'Stance' not in f})
+    mirrored = compile_model(ModelArtifact.from_dict(symmetric), api_server.STATE.fighter_stats)
+    assert abs((mirrored.logit(red, blue) - mirrored.bias) + (mirrored.logit(blue, red) - mirrored.bias)) < 1e-12
+    assert api_server.predict_winner('Alan', 'Nobody') == {'error': 'One or both fighters not found.'}
+
+def test_compiled_fighters_score_like_batch_rows_engineered_for_training():
+    # Precomputed ufc-master differences are Blue minus Red; engineering them from fighter stats must agree.
+    from batch_scoring import BatchScorer, CsvChunk
+    from conftest import make_fight
+    fight = make_fight('2024-06-01', 'Alan', 'Cole', red_rank='4', RedReachCms='190', BlueReachCms='178', RedAge='27', BlueAge='33',
+                       RedLosses='1', BlueLosses='5', ReachDif='-12', AgeDif='6', RedStance='Southpaw')
+    model = ModelArtifact.from_dict(MODEL)
+    stats = {corner: {**{field: fight[f'{corner}{field}'] for field in ('ReachCms', 'Age', 'Losses', 'WeightLbs', 'Stance')},
+                      'MatchWCRank': fight[f'{corner[0]}MatchWCRank']} for corner in ('Red', 'Blue')}
+    compiled = compile_model(model, stats)
+    batch = BatchScorer(model).logits(CsvChunk(list(fight), [list(fight.values())]))
+    assert abs(compiled.logit(compiled.rows['Red'], compiled.rows['Blue']) - float(batch[0])) < 1e-9
@@ -0,0 +1,62 @@
+import http.client
+import json
+import socket
+import threading
+import time
+import api_server
+
+def predict(port, red='Alan', blue='Cole'):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('POST', '/predict', json.dumps({'red_fighter': red, 'blue_fighter': blue}), {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    return conn, response.status, json.loads(response.read())
+
+def test_idle_keep_alive_connections_do_not_block_new_clients(server):
+    port = server.server_address[1]
+    # More idle keep-alive clients than there are work slots.
+    idle = [predict(port)[0] for _ in range(server.workers * 3)]
+    start = time.monotonic()
+    _, status, body = predict(port)
+    assert status == 200 and body['PredictedWinner'] in ('Alan', 'Cole')
+    assert time.monotonic() - start < 1.0
+    for conn in idle: conn.close()
+
+def test_keep_alive_connection_serves_several_requests(server):
+    conn, status, first = predict(server.server_address[1])
+    conn.request('POST', '/predict', json.dumps({'red_fighter': 'Cole', 'blue_fighter': 'Alan'}))
+    second = json.loads(conn.getresponse().read())
+    assert status == 200 and first['PredictedWinner'] == second['PredictedWinner']
+    conn.close()
+
+def test_work_is_bounded_by_the_slots(server):
+    port = server.server_address[1]
+    for _ in range(server.workers): server.work_slots.acquire()
+    done = []
+    client = threading.Thread(target=lambda: done.append(predict(port)[1]))
+    client.start()
+    time.sleep(0.3)
+    assert done == []
+    server.work_slots.release()
+    client.join(5)
+    assert done == [200]
+    for _ in range(server.workers - 1): server.work_slots.release()
+
+def test_oversized_bodies_are_refused_before_reading(server, monkeypatch):
+    monkeypatch.setattr(api_server, 'MAX_BODY_BYTES', 10)
+    with socket.create_connection(server.server_address) as sock:
+        sock.sendall(b'POST /predict HTTP/1.1\r\nHost: x\r\nContent-Length: 1000\r\n\r\n')
+        assert sock.recv(64).startswith(b'HTTP/1.1 413')
+
+def test_run_server_off_the_main_thread_skips_signal_handlers(serving_dir, monkeypatch):
+    installed = []
+    monkeypatch.setattr(api_server.signal, 'signal', lambda *args: installed.append(args))
+    started = threading.Event()
+    class Server:
+        def serve_forever(self): started.set()
+        def server_close(self): pass
+    monkeypatch.setattr(api_server, 'make_server', lambda *args: Server())
+    # run_server shuts its job queue down on the way out.
+    monkeypatch.setattr(api_server, 'CARD_JOBS', api_server.JobQueue(workers=1))
+    thread = threading.Thread(target=api_server.run_server, kwargs={'port': 0, 'watch_interval': None})
+    thread.start(); thread.join(5)
+    assert started.is_set() and installed == []
@@ -0,0 +1,53 @@
+import gzip
+import http.client
+import json
+import api_server
+from api_server import accepts_gzip
+
+def get(server, path, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.request('GET', path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+def test_accept_encoding_negotiation():
+    assert accepts_gzip('gzip, deflate, br')
+    assert accepts_gzip('deflate, *')
+    assert accepts_gzip('GZIP;q=0.5')
+    assert not accepts_gzip(None) and not accepts_gzip('br, deflate')
+    assert not accepts_gzip('gzip;q=0') and not accepts_gzip('*;q=0')
+    # An explicit gzip q-value overrides '*' whichever comes first.
+    assert not accepts_gzip('*;q=1, gzip;q=0')
+    assert not accepts_gzip('gzip;q=0, *')
+    assert accepts_gzip('*;q=0, gzip;q=0.1')
+    assert accepts_gzip('br;q=1, gzip ; q=0.8')
+
+def test_static_payloads_revalidate_with_their_etag(server):
+    response, body = get(server, '/weightclasses')
+    etag = response.getheader('ETag')
+    assert response.status == 200 and api_server.STATE.version in etag
+    assert 'Lightweight' in json.loads(body)
+    response, body = get(server, '/weightclasses', {'If-None-Match': etag})
+    assert response.status == 304 and body == b'' and response.getheader('ETag') == etag
+    assert get(server, '/weightclasses', {'If-None-Match': f'"other", W/{etag}'})[0].status == 304
+    assert get(server, '/weightclasses', {'If-None-Match': '"stale"'})[0].status == 200
+
+def test_static_payloads_are_gzipped_only_when_accepted(server, monkeypatch):
+    payload = api_server.STATE.static_payloads['/model_weights']
+    if payload.gzipped is None:
+        monkeypatch.setattr(api_server, 'MIN_GZIP_BYTES', 0)
+        assert api_server.load_data()
+    response, body = get(server, '/model_weights', {'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip' and response.getheader('Vary') == 'Accept-Encoding'
+    plain_response, plain = get(server, '/model_weights', {'Accept-Encoding': '*;q=1, gzip;q=0'})
+    assert plain_response.getheader('Content-Encoding') is None
+    assert gzip.decompress(body) == plain and int(plain_response.getheader('Content-Length')) == len(plain)
+    # Each coding has its own strong ETag, and revalidating one never hands back the other's 304.
+    gzip_etag, plain_etag = response.getheader('ETag'), plain_response.getheader('ETag')
+    assert gzip_etag == plain_etag[:-1] + '-gzip"'
+    assert get(server, '/model_weights', {'Accept-Encoding': 'gzip', 'If-None-Match': gzip_etag})[0].status == 304
+    revalidated, body = get(server, '/model_weights', {'If-None-Match': gzip_etag})
+    assert revalidated.status == 200 and body == plain and revalidated.getheader('ETag') == plain_etag
+    assert get(server, '/model_weights', {'Accept-Encoding': 'gzip', 'If-None-Match': plain_etag})[0].status == 200
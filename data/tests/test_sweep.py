@@ -0,0 +1,31 @@
+import json
+import numpy as np
+from sweep import build_grid, log_loss, run_sweep
+
+def write_training(path, n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 2))
+    y = (X @ np.array([2.0, -1.0]) + rng.normal(scale=0.5, size=n) > 0).astype(int)
+    path.write_text('Winner,ReachDif,AgeDif\n' + ''.join(f'{w},{a:.6f},{b:.6f}\n' for w, (a, b) in zip(y, X)))
+
+def test_grid_skips_learning_rates_for_newton():
+    assert len(build_grid('gd', [0.01, 0.1], [100, 200], [0.0, 0.1])) == 8
+    assert build_grid('newton', [0.01, 0.1], [50], [0.0, 0.1]) == [
+        {'solver': 'newton', 'learning_rate': 0.01, 'iterations': 50, 'l2': 0.0},
+        {'solver': 'newton', 'learning_rate': 0.01, 'iterations': 50, 'l2': 0.1}]
+
+def test_log_loss_clips_certain_mistakes():
+    assert log_loss(np.array([1.0, 0.0]), np.array([0.5, 0.5])) == np.log(2)
+    assert np.isfinite(log_loss(np.array([1.0]), np.array([0.0])))
+
+def test_sweep_ranks_configs_and_saves_the_best(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_training(tmp_path / 'training.csv')
+    grid = build_grid('gd', [0.5, 1e-4], [200], [0.0])
+    table = run_sweep(grid, folds=3, workers=2, output='model.json')
+    assert [row['learning_rate'] for row in table] == [0.5, 1e-4]
+    assert table[0]['log_loss'] < table[1]['log_loss']
+    # Same seed, same folds, same scores.
+    assert run_sweep(grid, folds=3, workers=1, output='') == table
+    model = json.loads((tmp_path / 'model.json').read_text())
+    assert model['weights']['ReachDif'] > 0 > model['weights']['AgeDif']
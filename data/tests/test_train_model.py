@@ -0,0 +1,45 @@
+import json
+import numpy as np
+import pytest
+from train_model import fit, fit_gradient_descent, fit_newton, train_model
+
+def toy_problem(n=400, seed=1):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3))
+    y = (X @ np.array([1.5, -1.0, 0.0]) + 0.3 + rng.normal(scale=1.0, size=n) > 0).astype(np.float64)
+    return X, y
+
+@pytest.mark.parametrize('solver', [fit_gradient_descent, fit_newton])
+def test_zero_iterations_returns_the_zero_model(solver):
+    X, y = toy_problem()
+    weights, bias, steps = solver(X, y, iterations=0)
+    assert steps == 0
+    assert bias == 0.0
+    assert np.array_equal(weights, np.zeros(3))
+
+def test_newton_and_gradient_descent_agree():
+    X, y = toy_problem()
+    gd_weights, gd_bias, gd_steps = fit(X, y, 'gd', learning_rate=0.5, iterations=5000, tol=1e-10)
+    newton_weights, newton_bias, newton_steps = fit(X, y, 'newton', iterations=100, tol=1e-10)
+    assert newton_steps < 100
+    assert np.allclose(gd_weights, newton_weights, atol=1e-4)
+    assert gd_bias == pytest.approx(newton_bias, abs=1e-4)
+
+def test_stops_early_once_converged():
+    X, y = toy_problem()
+    _, _, steps = fit_newton(X, y, iterations=100, tol=1e-8)
+    assert 0 < steps < 100
+
+def test_unknown_solver_is_rejected():
+    X, y = toy_problem()
+    with pytest.raises(ValueError):
+        fit(X, y, 'adam')
+
+def test_train_model_with_zero_iterations_writes_a_zero_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'training.csv').write_text("Winner,ReachDif,AgeDif\n1,5,-2\n0,-3,4\n1,2,\n0,-1,1\n")
+    train_model(iterations=0)
+    model = json.loads((tmp_path / 'model.json').read_text())
+    assert model['weights'] == {'ReachDif': 0.0, 'AgeDif': 0.0}
+    assert model['bias'] == 0.0
+    assert (tmp_path / 'model.bin').exists()
@@ -1,77 +1,135 @@
-import csv
 import json
-import math
+import os
+import numpy as np
+from dataset import load_table
+from model_artifact import ModelArtifact, save_artifact
 
-def calculate_scaling_params(data, features):
+def load_training_matrix(name='training'):
+    # Memory-maps training.npy when prepare_training_data wrote one, otherwise parses the CSV once.
+    columns, data = load_table(name)
+    if not columns or len(data) == 0:
+        return [], None, None
+
+    winner_index = columns.index('Winner')
+    data = data[~np.isnan(data[:, winner_index])]
+
+    features = [h for i, h in enumerate(columns) if i != winner_index]
+    X = np.ascontiguousarray(np.delete(data, winner_index, axis=1))
+    y = np.ascontiguousarray(data[:, winner_index])
+    return features, X, y
+
+def calculate_scaling_params(X, features):
     params = {}
-    for feature in features:
-        try:
-            values = [float(row[feature]) for row in data if row[feature]]
-            if not values:
-                continue
-            mean = sum(values) / len(values)
-            std_dev = math.sqrt(sum([(v - mean) ** 2 for v in values]) / len(values))
-            if std_dev == 0:
-                std_dev = 1
-            params[feature] = {'mean': mean, 'std_dev': std_dev}
-        except (ValueError, TypeError):
+    present = ~np.isnan(X)
+    counts = present.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nansum(X, axis=0) / counts
+        std_devs = np.sqrt(np.nansum((X - means) ** 2, axis=0) / counts)
+    for j, feature in enumerate(features):
+        if counts[j] == 0:
             continue
+        std_dev = float(std_devs[j])
+        if std_dev == 0:
+            std_dev = 1
+        params[feature] = {'mean': float(means[j]), 'std_dev': std_dev}
     return params
 
-def train_model(learning_rate=0.01, iterations=1000):
-    with open('training.csv', 'r') as infile:
-        reader = csv.DictReader(infile)
-        data = list(reader)
-        if not data:
-            print("Training data is empty.")
-            return
+def standardize(X, features, scaling_params):
+    # Missing values and unscaled features contribute nothing, as in the original per-row loop.
+    means = np.array([scaling_params[f]['mean'] if f in scaling_params else 0.0 for f in features])
+    std_devs = np.array([scaling_params[f]['std_dev'] if f in scaling_params else 1.0 for f in features])
+    scaled = (X - means) / std_devs
+    scaled[np.isnan(scaled)] = 0.0
+    scaled[:, [f not in scaling_params for f in features]] = 0.0
+    return np.ascontiguousarray(scaled)
 
-    features = [h for h in data[0].keys() if h != 'Winner']
-    
-    scaling_params = calculate_scaling_params(data, features)
+def _sigmoid(z):
+    z = np.clip(z, -100, 100) # Clipping z to prevent overflow
+    return 1 / (1 + np.exp(-z))
 
-    weights = {feature: 0.0 for feature in features}
+def fit_gradient_descent(X, y, learning_rate=0.01, iterations=1000, tol=1e-6, batch_size=None, seed=0, l2=0.0):
+    # Full-batch gradient descent, or mini-batch SGD when batch_size is set (one epoch per iteration).
+    num_samples, num_features = X.shape
+    weights = np.zeros(num_features)
     bias = 0.0
+    rng = np.random.default_rng(seed)
+    batch_size = num_samples if not batch_size else min(batch_size, num_samples)
+
+    steps = 0
+    for steps in range(1, iterations + 1):
+        order = rng.permutation(num_samples) if batch_size < num_samples else None
+        largest_step = 0.0
+        for start in range(0, num_samples, batch_size):
+            if order is None:
+                X_batch, y_batch = X, y
+            else:
+                batch = order[start:start + batch_size]
+                X_batch, y_batch = X[batch], y[batch]
+            error = _sigmoid(X_batch @ weights + bias) - y_batch
+            step_weights = learning_rate * ((X_batch.T @ error) / len(y_batch) + l2 * weights)
+            step_bias = learning_rate * error.mean()
+            weights -= step_weights
+            bias -= step_bias
+            largest_step = max(largest_step, np.abs(step_weights).max(initial=0.0), abs(step_bias))
+        if largest_step < tol:
+            break
+    return weights, bias, steps
+
+def fit_newton(X, y, iterations=100, tol=1e-6, ridge=1e-8, l2=0.0):
+    # Newton-Raphson / IRLS using the closed-form logistic Hessian X^T S X.
+    num_samples, num_features = X.shape
+    design = np.hstack([X, np.ones((num_samples, 1))])
+    theta = np.zeros(num_features + 1)
+    # The L2 penalty applies to the weights only; `ridge` just keeps the Hessian invertible.
+    penalty = np.append(np.full(num_features, l2), 0.0)
+    regularizer = np.diag(penalty + ridge)
 
-    for i in range(iterations):
-        d_weights = {feature: 0.0 for feature in features}
-        d_bias = 0.0
-        
-        for row in data:
-            z = bias
-            for feature in features:
-                if feature in scaling_params and row[feature]:
-                    try:
-                        scaled_value = (float(row[feature]) - scaling_params[feature]['mean']) / scaling_params[feature]['std_dev']
-                        z += weights[feature] * scaled_value
-                    except (ValueError, TypeError):
-                        continue
-
-            z = max(-100, min(100, z)) # Clipping z to prevent overflow
-            prediction = 1 / (1 + math.exp(-z))
-            
-            error = prediction - float(row['Winner'])
-            
-            d_bias += error
-            for feature in features:
-                if feature in scaling_params and row[feature]:
-                    try:
-                        scaled_value = (float(row[feature]) - scaling_params[feature]['mean']) / scaling_params[feature]['std_dev']
-                        d_weights[feature] += error * scaled_value
-                    except (ValueError, TypeError):
-                        continue
-
-        num_samples = len(data)
-        bias -= learning_rate * (d_bias / num_samples)
-        for feature in features:
-            if feature in d_weights:
-                weights[feature] -= learning_rate * (d_weights[feature] / num_samples)
-
-    model = {'weights': weights, 'bias': bias, 'scaling_params': scaling_params}
-    with open('model.json', 'w') as outfile:
+    steps = 0
+    for steps in range(1, iterations + 1):
+        prediction = _sigmoid(design @ theta)
+        gradient = design.T @ (prediction - y) / num_samples + penalty * theta
+        hessian = (design.T * (prediction * (1 - prediction))) @ design / num_samples
+        step = np.linalg.solve(hessian + regularizer, gradient)
+        theta -= step
+        if np.abs(step).max() < tol:
+            break
+    return theta[:-1], float(theta[-1]), steps
+
+def fit(X, y, solver='gd', learning_rate=0.01, iterations=1000, tol=1e-6, batch_size=None, l2=0.0):
+    if solver == 'newton':
+        return fit_newton(X, y, iterations=iterations, tol=tol, l2=l2)
+    if solver in ('gd', 'sgd'):
+        if solver == 'sgd' and not batch_size:
+            batch_size = 256
+        return fit_gradient_descent(X, y, learning_rate, iterations, tol, batch_size, l2=l2)
+    raise ValueError(f"Unknown solver '{solver}'. Expected 'gd', 'sgd' or 'newton'.")
+
+def save_model(features, weights, bias, scaling_params, path='model.json'):
+    model = {
+        'weights': {feature: float(w) for feature, w in zip(features, weights)},
+        'bias': float(bias),
+        'scaling_params': scaling_params
+    }
+    # Write then rename, so a running server never picks up a half-written model.json.
+    with open(f'{path}.tmp', 'w') as outfile:
         json.dump(model, outfile, indent=4)
+    os.replace(f'{path}.tmp', path)
+    # The binary artifact is written second, so load_model sees it as at least as new as the JSON.
+    save_artifact(ModelArtifact.from_dict(model), os.path.splitext(path)[0] + '.bin')
+    return model
+
+def train_model(learning_rate=0.01, iterations=1000, solver='gd', batch_size=None, tol=1e-6, l2=0.0):
+    features, X, y = load_training_matrix('training')
+    if X is None or len(y) == 0:
+        print("Training data is empty.")
+        return
+
+    scaling_params = calculate_scaling_params(X, features)
+    X_scaled = standardize(X, features, scaling_params)
+    weights, bias, steps = fit(X_scaled, y, solver, learning_rate, iterations, tol, batch_size, l2)
+    save_model(features, weights, bias, scaling_params)
 
-    print("Model training complete. Model saved to model.json")
+    print(f"Model training complete ({solver}, {steps} iterations). Model saved to model.json")
 
 if __name__ == '__main__':
-    train_model()
\ No newline at end of file
+    train_model()